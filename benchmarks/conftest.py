@@ -0,0 +1,29 @@
+import pytest
+
+from .generators import make_catalog, make_object_data, make_object_field
+
+
+# Deep and wide object trees as (depth, width)
+OBJECT_SHAPES = [(10, 2), (2, 50)]
+
+CATALOG_SIZES = [100, 10000]
+
+
+@pytest.fixture(params=OBJECT_SHAPES, ids=lambda shape: '{}x{}'.format(*shape))
+def object_shape(request):
+    return request.param
+
+
+@pytest.fixture
+def object_field(object_shape):
+    return make_object_field(*object_shape)()
+
+
+@pytest.fixture
+def object_data(object_shape):
+    return make_object_data(*object_shape)
+
+
+@pytest.fixture(params=CATALOG_SIZES)
+def catalog(request):
+    return make_catalog(request.param)
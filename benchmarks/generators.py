@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from lanthanum.schema_fields import (
+    BooleanField,
+    CharField,
+    DecimalField,
+    IntegerField,
+    ObjectField
+)
+
+
+def make_object_field(depth, width, prefix='bench'):
+    """
+    Build a nested object field with width scalar fields at every level
+    """
+    attrs = {
+        'Meta': type(
+            'Meta',
+            (),
+            {'schema_name': '{}_{}x{}'.format(prefix, depth, width)}
+        )
+    }
+    for i in range(width):
+        attrs['text_{}'.format(i)] = CharField(required=i == 0)
+        attrs['number_{}'.format(i)] = IntegerField()
+        attrs['price_{}'.format(i)] = DecimalField()
+        attrs['flag_{}'.format(i)] = BooleanField()
+    if depth > 1:
+        attrs['child'] = make_object_field(depth - 1, width, prefix)()
+
+    return type('Bench{}x{}Field'.format(depth, width), (ObjectField,), attrs)
+
+
+def make_object_data(depth, width):
+    """
+    Build data matching make_object_field
+    """
+    data = {}
+    for i in range(width):
+        data['text_{}'.format(i)] = 'Text {}'.format(i)
+        data['number_{}'.format(i)] = i
+        data['price_{}'.format(i)] = Decimal('{}.99'.format(i))
+        data['flag_{}'.format(i)] = bool(i % 2)
+    if depth > 1:
+        data['child'] = make_object_data(depth - 1, width)
+    return data
+
+
+def make_catalog(size):
+    """
+    Build a record catalog alternating between singles and albums
+    """
+    catalog = []
+    for i in range(size):
+        if i % 2:
+            catalog.append({
+                'schemaName': 'album',
+                'data': {'title': 'Album {}'.format(i)}
+            })
+        else:
+            catalog.append({
+                'schemaName': 'single',
+                'data': {
+                    'title': 'Single {}'.format(i),
+                    'artist': 'Artist {}'.format(i % 100)
+                }
+            })
+    return catalog
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from lanthanum.tests.mock_app.models import RecordShop
+from lanthanum.tests.mock_app.schema_fields import music_catalog_field
+from lanthanum.validation import get_validator
+from lanthanum.widgets import JSONEditorWidget
+
+pytest.importorskip('pytest_benchmark')
+
+
+class TestSchema:
+    def test_schema(self, benchmark, object_field):
+        benchmark(lambda: object_field.schema)
+
+    def test_editor_schema(self, benchmark, object_field):
+        benchmark(lambda: object_field.editor_schema)
+
+    def test_dynamic_array_editor_schema(self, benchmark):
+        benchmark(lambda: music_catalog_field.editor_schema)
+
+
+class TestHydration:
+    def test_dynamic_object(self, benchmark, object_field, object_data):
+        python_type = object_field.Meta.python_type
+        benchmark(python_type, object_data)
+
+    def test_dynamic_array(self, benchmark, catalog):
+        python_type = music_catalog_field.Meta.python_type
+        benchmark(python_type, catalog)
+
+
+class TestValidation:
+    def test_object(self, benchmark, object_field, object_data):
+        benchmark(get_validator(object_field).validate, object_data)
+
+    def test_dynamic_array(self, benchmark, catalog):
+        benchmark(get_validator(music_catalog_field).validate, catalog)
+
+    def test_dynamic_array_fail_fast(self, benchmark, catalog):
+        benchmark(get_validator(music_catalog_field).is_valid, catalog)
+
+    def test_dynamic_array_one_change(self, benchmark, catalog):
+        changed = list(catalog)
+        changed[len(changed) // 2] = {
+            'schemaName': 'album', 'data': {'title': 'Changed'}
+        }
+        validator = get_validator(music_catalog_field)
+        validator.validate(catalog)
+        benchmark(validator.validate, changed, previous=catalog)
+
+
+@pytest.mark.django_db
+class TestDatabase:
+    def test_save(self, benchmark, catalog):
+        record_shop = RecordShop.objects.create(name='HMV')
+
+        def save():
+            record_shop.catalog = catalog
+            record_shop.save()
+
+        benchmark(save)
+
+    def test_load(self, benchmark, catalog):
+        record_shop = RecordShop.objects.create(name='HMV', catalog=catalog)
+        benchmark(record_shop.refresh_from_db)
+
+
+class TestRendering:
+    def test_widget_render(self, benchmark, catalog):
+        widget = JSONEditorWidget(
+            music_catalog_field.editor_schema,
+            collapsed=False
+        )
+        benchmark(widget.render, 'catalog', json.dumps(catalog))
@@ -0,0 +1,139 @@
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import caches
+from django.db.models import Q
+
+from .columns import _resolve_path, count_values
+from .queries import block_query, value_query
+from .utils import content_hash
+
+
+def block_filter(field_name, title=None):
+    """
+    Build a list filter for documents containing an item of a schema
+
+    The choices are the schemas allowed in the field's dynamic array.
+    """
+    class BlockFilter(admin.SimpleListFilter):
+        parameter_name = '{}_block'.format(field_name)
+
+        def lookups(self, request, model_admin):
+            schema_field = model_admin.model._meta.get_field(
+                field_name
+            ).schema_field
+            return [
+                (
+                    item_field.Meta.schema_name,
+                    item_field._label or item_field.Meta.schema_name
+                )
+                for item_field in schema_field._allowed_fields
+            ]
+
+        def queryset(self, request, queryset):
+            if self.value() is None:
+                return queryset
+            return queryset.filter(block_query(field_name, self.value()))
+
+    BlockFilter.title = title or "{} block".format(
+        field_name.replace('_', ' ')
+    )
+    return BlockFilter
+
+
+def value_filter(field_name, path, title=None, choices=None, limit=20,
+                 cache_alias='default', cache_timeout=300):
+    """
+    Build a list filter for documents with a value at a schema path
+
+    Without choices, booleans are filtered by yes or no and other values
+    by the limit most common values in the admin's queryset, counted in
+    the database. Counting reads every document, so the values are cached
+    for cache_timeout seconds for each queryset.
+    """
+    class ValueFilter(admin.SimpleListFilter):
+        parameter_name = '{}_{}'.format(
+            field_name, path.replace('*', 'any').replace('.', '_')
+        )
+
+        def lookups(self, request, model_admin):
+            if choices is not None:
+                return choices
+            schema_field = model_admin.model._meta.get_field(
+                field_name
+            ).schema_field
+            python_types = {
+                python_type
+                for _, _, python_type in _resolve_path(schema_field, path)
+            }
+            if python_types == {bool}:
+                return [('true', "Yes"), ('false', "No")]
+
+            queryset = model_admin.get_queryset(request)
+            cache = caches[cache_alias]
+            key = 'lanthanum.value_filter:{}:{}'.format(
+                self.parameter_name,
+                content_hash([str(queryset.query), limit])
+            )
+            values = cache.get(key)
+            if values is None:
+                counts = None
+                for counter in count_values(
+                    queryset, field_name, path
+                ).values():
+                    counts = counter if counts is None else counts + counter
+                values = [
+                    str(value)
+                    for value, count in (counts or {}).most_common(limit)
+                ]
+                cache.set(key, values, timeout=cache_timeout)
+            return [(value, value) for value in values]
+
+        def queryset(self, request, queryset):
+            if self.value() is None:
+                return queryset
+            try:
+                query = value_query(
+                    queryset.model, field_name, path, self.value()
+                )
+            except ValueError as error:
+                raise IncorrectLookupParameters(error)
+            return queryset.filter(query)
+
+    ValueFilter.title = title or path.replace('*.', '').replace('.', ' ')
+    return ValueFilter
+
+
+class DynamicSearchMixin(object):
+    """
+    Search model admins for exact values at schema paths of dynamic fields
+
+    List (field_name, path) pairs in dynamic_search_fields. A search term
+    matches documents with the term at any of the paths, using jsonb
+    containment so GIN indexes on the fields are used, as well as the
+    results for the admin's search_fields. Django only shows the search box
+    when search_fields is set.
+    """
+    dynamic_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        results, use_distinct = super().get_search_results(
+            request, queryset, search_term
+        )
+        search_term = search_term.strip()
+        if not search_term or not self.dynamic_search_fields:
+            return results, use_distinct
+
+        query = Q()
+        for field_name, path in self.dynamic_search_fields:
+            try:
+                query |= value_query(
+                    queryset.model, field_name, path, search_term
+                )
+            except ValueError:
+                # The term doesn't fit the type of the field at the path
+                continue
+        if not query:
+            return results, use_distinct
+        if not self.get_search_fields(request):
+            return queryset.filter(query), use_distinct
+        return results | queryset.filter(query), use_distinct
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+import hashlib
+import threading
+
+
+class DocumentCache(object):
+    """
+    A least recently used cache of hydrated documents bounded by size
+
+    Documents are keyed by the model, the field and a hash of the JSON text
+    the database sent, so a row loaded again without changes reuses the
+    document built before, without decoding its JSON, and an edited row
+    misses the cache. PostgreSQL writes jsonb in a canonical form, so the
+    text doesn't need to be serialized again to compare it. The size of
+    each document is taken as the length of its JSON.
+
+    Cached documents are shared by every row with the same content, so they
+    must not be changed in place. Fields with a document cache always build
+    frozen documents; thaw() a document to edit it.
+    """
+    def __init__(self, max_size=32 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, content, hydrate):
+        """
+        Get the hydrated document for some JSON text, building it if needed
+        """
+        key = (namespace, hashlib.sha1(content.encode('utf-8')).hexdigest())
+
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry is not None:
+                self._documents.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        document = hydrate(content)
+        size = len(content)
+        if size > self.max_size:
+            return document
+
+        with self._lock:
+            if key not in self._documents:
+                self._documents[key] = (document, size)
+                self.size += size
+                while self.size > self.max_size:
+                    __, (__, evicted_size) = self._documents.popitem(
+                        last=False
+                    )
+                    self.size -= evicted_size
+                    self.evictions += 1
+        return document
+
+    def clear(self):
+        """
+        Remove every document from the cache
+        """
+        with self._lock:
+            self._documents.clear()
+            self.size = 0
+
+    def stats(self):
+        """
+        Report hits, misses, evictions and the current size of the cache
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'documents': len(self._documents),
+                'size': self.size,
+                'max_size': self.max_size
+            }
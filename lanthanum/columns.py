@@ -0,0 +1,183 @@
+from array import array
+from collections import Counter
+from decimal import Decimal
+import json
+
+from django.contrib.postgres.fields import JSONField
+from django.db import connections
+from django.db.models import ExpressionWrapper, F
+
+from .schema_fields import DynamicArrayField, ObjectField
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# Database casts and array typecodes for each scalar python type
+COLUMN_TYPES = {
+    int: ('bigint', 'q'),
+    Decimal: ('numeric', 'd'),
+    bool: ('boolean', 'b'),
+    str: ('text', None)
+}
+
+
+def _resolve_path(schema_field, path):
+    """
+    Find the schema names and scalar field for each part of a path
+
+    For dynamic arrays the first part of the path is the schema name of the
+    items, or * for every allowed schema with the rest of the path.
+    Returns a list of (schema_name, json_path, python_type) tuples.
+    """
+    parts = path.split('.')
+    if isinstance(schema_field, DynamicArrayField):
+        schema_name, parts = parts[0], parts[1:]
+        item_fields = [
+            field for field in schema_field._allowed_fields
+            if schema_name in ('*', field.Meta.schema_name)
+        ]
+        prefix = ['data']
+    else:
+        item_fields = [schema_field]
+        prefix = []
+
+    resolved = []
+    for item_field in item_fields:
+        field = item_field
+        for part in parts:
+            if not isinstance(field, ObjectField):
+                field = None
+                break
+            field = field._sub_fields.get(part)
+            if field is None:
+                break
+        if field is None:
+            continue
+        if field.Meta.python_type not in COLUMN_TYPES:
+            raise ValueError(
+                "{} does not lead to a scalar field".format(path)
+            )
+        resolved.append((
+            item_field.Meta.schema_name,
+            prefix + parts,
+            field.Meta.python_type
+        ))
+
+    if not resolved:
+        raise ValueError("{} does not match the schema".format(path))
+    return resolved
+
+
+def _values_sql(queryset, field_name, schema_name, json_path, python_type,
+                is_array):
+    """
+    Build SQL selecting the values at a path from the documents of a query
+    """
+    # Selected as a plain JSONField, so the documents are jsonb even when
+    # the field selects their text for a document cache
+    document = ExpressionWrapper(F(field_name), output_field=JSONField())
+    compiler = queryset.values_list(document).query.get_compiler(
+        queryset.db
+    )
+    document_sql, document_params = compiler.as_sql()
+    cast = COLUMN_TYPES[python_type][0]
+
+    if is_array:
+        sql = (
+            "SELECT (item #>> %s)::{cast} "
+            "FROM ({documents}) AS documents(document), "
+            "jsonb_array_elements(document) AS element(item) "
+            "WHERE document @> %s::jsonb AND item->>'schemaName' = %s "
+            "AND item #>> %s IS NOT NULL"
+        ).format(cast=cast, documents=document_sql)
+        params = (
+            [json_path] +
+            list(document_params) +
+            [json.dumps([{'schemaName': schema_name}]), schema_name] +
+            [json_path]
+        )
+    else:
+        sql = (
+            "SELECT (document #>> %s)::{cast} "
+            "FROM ({documents}) AS documents(document) "
+            "WHERE document #>> %s IS NOT NULL"
+        ).format(cast=cast, documents=document_sql)
+        params = [json_path] + list(document_params) + [json_path]
+    return sql, params
+
+
+def _to_column(values, python_type, as_numpy):
+    """
+    Pack a list of values into a compact column
+    """
+    typecode = COLUMN_TYPES[python_type][1]
+    if as_numpy:
+        if numpy is None:
+            raise ImportError("NumPy is required for NumPy columns")
+        dtype = {'q': numpy.int64, 'd': numpy.float64, 'b': numpy.bool_}
+        return numpy.array(values, dtype=dtype.get(typecode, object))
+    if typecode is None:
+        return values
+    if typecode == 'd':
+        values = [float(value) for value in values]
+    return array(typecode, values)
+
+
+def extract_column(queryset, field_name, path, as_numpy=False):
+    """
+    Extract the values at a schema path from every row of a queryset
+
+    The path names the item schema and then its sub fields, for example
+    "single.artist", or "*.title" for every item schema with a title. For
+    fields that are not dynamic arrays the path starts with the sub field.
+    The values are read in the database without building dynamic objects,
+    and returned for each schema name as an array for numbers and booleans,
+    a list for strings, or NumPy arrays when as_numpy is set. Missing
+    values are skipped.
+    """
+    field = queryset.model._meta.get_field(field_name)
+    is_array = isinstance(field.schema_field, DynamicArrayField)
+    connection = connections[queryset.db]
+
+    columns = {}
+    for schema_name, json_path, python_type in _resolve_path(
+        field.schema_field, path
+    ):
+        sql, params = _values_sql(
+            queryset, field_name, schema_name, json_path, python_type,
+            is_array
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            values = [value for (value,) in cursor.fetchall()]
+        columns[schema_name] = _to_column(values, python_type, as_numpy)
+    return columns
+
+
+def count_values(queryset, field_name, path):
+    """
+    Count how often each value occurs at a schema path, grouped in SQL
+    """
+    field = queryset.model._meta.get_field(field_name)
+    is_array = isinstance(field.schema_field, DynamicArrayField)
+    connection = connections[queryset.db]
+
+    counts = {}
+    for schema_name, json_path, python_type in _resolve_path(
+        field.schema_field, path
+    ):
+        sql, params = _values_sql(
+            queryset, field_name, schema_name, json_path, python_type,
+            is_array
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT value, COUNT(*) FROM ({}) AS items(value) "
+                "GROUP BY value".format(sql),
+                params
+            )
+            counts[schema_name] = Counter(dict(cursor.fetchall()))
+    return counts
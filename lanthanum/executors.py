@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+# Enough threads to keep the event loop free without starving the database
+DEFAULT_MAX_WORKERS = 4
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def get_default_executor():
+    """
+    Get the thread pool shared by fields without their own executor
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_MAX_WORKERS
+            )
+    return _default_executor
+
+
+def run_in_executor(executor, function, *args):
+    """
+    Run a function in an executor, returning a future for the event loop
+
+    The number of workers in the executor bounds how many calls run at
+    once, and the rest wait in its queue without blocking the loop.
+    """
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(
+        executor or get_default_executor(), function, *args
+    )
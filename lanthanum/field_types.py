@@ -1,6 +1,119 @@
-from collections import MutableSequence
+from collections import MutableSequence, Sequence
+from decimal import Decimal, InvalidOperation
+from uuid import uuid4
+from weakref import WeakKeyDictionary
 
 from .schema_registry import get_python_type
+from .transforms import upgrade_item, upgrade_items
+from .utils import content_hash
+
+
+TRUE_STRINGS = {'true', 't', 'yes', 'y', 'on', '1'}
+
+
+def to_str(value):
+    if value.__class__ is str:
+        return value
+    return str(value)
+
+
+def to_int(value):
+    if value.__class__ is int:
+        return value
+    return int(value)
+
+
+def to_bool(value):
+    """
+    Convert to a boolean, reading strings such as "false" as False
+    """
+    if value.__class__ is bool:
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_STRINGS
+    return bool(value)
+
+
+def to_decimal(value):
+    """
+    Convert to a decimal, using the shortest repr of floats
+
+    Decimals are stored as JSON numbers and loaded as floats, so converting
+    through the float's repr restores the number that was written rather
+    than its binary approximation.
+    """
+    if value.__class__ is Decimal:
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+converters = {
+    str: to_str,
+    int: to_int,
+    bool: to_bool,
+    Decimal: to_decimal
+}
+
+
+def get_converter(python_type):
+    """
+    Get the function converting loaded data into a python type
+    """
+    return converters.get(python_type, python_type)
+
+
+def hydrate_data(python_type, data):
+    """
+    Build the python type for some data, or return the data as it is if it
+    doesn't fit, leaving validation to report why
+    """
+    try:
+        return python_type(data)
+    except (
+        AttributeError,
+        InvalidOperation,
+        KeyError,
+        TypeError,
+        ValueError
+    ):
+        return data
+
+
+def dump_value(value, raw=None):
+    """
+    Convert a python value back into data, reusing the raw data it was
+    converted from when it hasn't changed
+    """
+    if value is raw:
+        return raw
+    dump = getattr(value, '_dump', None)
+    if dump is not None:
+        return dump()
+    if isinstance(value, Decimal):
+        if raw.__class__ in (int, float) and to_decimal(raw) == value:
+            return raw
+        return float(value)
+    return value
+
+
+def get_data(value):
+    """
+    Get the data of a value as it would be saved
+
+    Changes made to mutable documents since they were built are included,
+    and other values are returned as they are.
+    """
+    dump = getattr(value, '_dump', None)
+    if dump is None:
+        return value
+    return dump()
+
+
+# The converters for the sub types of each dynamic object class, kept off
+# the classes so they aren't taken for sub types
+_type_converters = WeakKeyDictionary()
 
 
 class DynamicObject(object):
@@ -14,12 +127,53 @@ class DynamicObject(object):
             for name, field_type in cls.__dict__.items()
         }
 
+    @classmethod
+    def _get_converters(cls):
+        """
+        Get the converter for each sub type, built once for each class
+
+        Only types and other callables are sub types, so other class
+        attributes, such as defaults, are left alone.
+        """
+        converters = _type_converters.get(cls)
+        if converters is None:
+            converters = _type_converters[cls] = {
+                name: get_converter(sub_type)
+                for name, sub_type in cls._get_sub_types().items()
+                if callable(sub_type)
+            }
+        return converters
+
     def __init__(self, data):
         self._data = data
-        sub_types = self._get_sub_types()
+        converters = self._get_converters()
         for k, v in data.items():
-            if k in sub_types:
-                setattr(self, k, sub_types[k](v))
+            if k in converters:
+                setattr(self, k, converters[k](v))
+
+    def _dump(self):
+        """
+        Get the data of the object, including changes to its sub fields
+
+        The data it was built from is returned when nothing has changed.
+        """
+        data = self._data
+        attributes = self.__dict__
+        changes = {}
+        removed = []
+        for name in self._get_converters():
+            if name in attributes:
+                value = dump_value(attributes[name], data.get(name))
+                if name not in data or value is not data[name]:
+                    changes[name] = value
+            elif name in data:
+                removed.append(name)
+        if not changes and not removed:
+            return data
+        data = dict(data, **changes)
+        for name in removed:
+            del data[name]
+        return data
 
 
 class TypedArray(MutableSequence):
@@ -47,10 +201,21 @@ class TypedArray(MutableSequence):
         del self._list[i]
 
     def __setitem__(self, i, v):
-        self._list[i] = self.Meta.base_type(v)
+        self._list[i] = get_converter(self.Meta.base_type)(v)
 
     def insert(self, i, v):
-        self._list.insert(i, self.Meta.base_type(v))
+        self._list.insert(i, get_converter(self.Meta.base_type)(v))
+
+    def _dump(self):
+        """
+        Get the data of the array, including changes to its items
+        """
+        data = self._data
+        raw = data if len(data) == len(self._list) else [None] * len(self)
+        dumped = [dump_value(v, r) for v, r in zip(self._list, raw)]
+        if raw is data and all(v is r for v, r in zip(dumped, data)):
+            return data
+        return dumped
 
     def __str__(self):
         return str(self._list)
@@ -59,17 +224,65 @@ class TypedArray(MutableSequence):
         return str(self._list)
 
 
-class DynamicArray(MutableSequence):
+def assign_item_ids(items):
+    """
+    Give each typed item without an ID a new random one
+
+    The items without IDs are copied rather than changed, and the items are
+    returned as they are when they all have IDs.
+    """
+    if all(not isinstance(item, dict) or item.get('id') for item in items):
+        return items
+    return [
+        dict(item, id=uuid4().hex)
+        if isinstance(item, dict) and not item.get('id') else item
+        for item in items
+    ]
+
+
+class ItemIndex(object):
+    """
+    Look up the items of a dynamic array by their stable IDs
+
+    The index is built when first used and dropped when the array changes.
+    """
+    _id_index = None
+
+    def get_by_id(self, item_id):
+        """
+        Get the item with an ID, raising a KeyError if there is none
+        """
+        return self[self.index_of_id(item_id)]
+
+    def index_of_id(self, item_id):
+        """
+        Get the position of the item with an ID
+        """
+        if self._id_index is None:
+            self._id_index = {
+                item_id: i
+                for i, item_id in enumerate(self._ids)
+                if item_id is not None
+            }
+        return self._id_index[item_id]
+
+
+class DynamicArray(ItemIndex, MutableSequence):
     """
     An array that includes items of different types
     """
     def __init__(self, data, **kwargs):
         """
         Initiate list as instance property
+
+        Items saved with an older version of their schema are upgraded, so
+        the data always matches the current schemas.
         """
-        self._data = data
+        self._data = upgrade_items(data)
         self._list = list()
-        self.extend(list(data))
+        self._ids = list()
+        self._wrappers = list()
+        self.extend(list(self._data))
 
     def __len__(self):
         return len(self._list)
@@ -79,17 +292,244 @@ class DynamicArray(MutableSequence):
 
     def __delitem__(self, i):
         del self._list[i]
+        del self._ids[i]
+        del self._wrappers[i]
+        self._id_index = None
 
-    def __setitem__(self, i, v):
+    @staticmethod
+    def hydrate_item(v):
+        """
+        Convert a typed item into the python type for its schema name
+        """
+        v = upgrade_item(v)
         python_type = get_python_type(schema_name=v['schemaName'])
-        self._list[i] = python_type(v['data'])
+        return python_type(v['data'])
+
+    def __setitem__(self, i, v):
+        v = upgrade_item(v)
+        self._list[i] = self.hydrate_item(v)
+        self._ids[i] = v.get('id')
+        self._wrappers[i] = v
+        self._id_index = None
 
     def insert(self, i, v):
-        python_type = get_python_type(schema_name=v['schemaName'])
-        self._list.insert(i, python_type(v['data']))
+        v = upgrade_item(v)
+        self._list.insert(i, self.hydrate_item(v))
+        self._ids.insert(i, v.get('id'))
+        self._wrappers.insert(i, v)
+        self._id_index = None
+
+    def _dump(self):
+        """
+        Get the data of the array, including added, removed and changed
+        items
+        """
+        data = self._data
+        dumped = []
+        for wrapper, item in zip(self._wrappers, self._list):
+            item_data = dump_value(item, wrapper['data'])
+            if item_data is not wrapper['data']:
+                wrapper = dict(wrapper, data=item_data)
+            dumped.append(wrapper)
+        if len(dumped) == len(data) and all(
+            item is stored for item, stored in zip(dumped, data)
+        ):
+            return data
+        return dumped
 
     def __str__(self):
         return str(self._list)
 
     def __repr__(self):
         return str(self._list)
+
+
+class FrozenDynamicObject(DynamicObject):
+    """
+    An immutable schema object that can be shared between threads
+
+    Frozen types are generated from a mutable type by freeze_type, and
+    nested objects and arrays are frozen too.
+    """
+    _mutable_type = DynamicObject
+
+    @classmethod
+    def _get_sub_types(cls):
+        return cls._mutable_type._get_sub_types()
+
+    @classmethod
+    def _get_converters(cls):
+        converters = _type_converters.get(cls)
+        if converters is None:
+            converters = _type_converters[cls] = {
+                name: get_converter(freeze_type(sub_type))
+                for name, sub_type in cls._get_sub_types().items()
+                if callable(sub_type)
+            }
+        return converters
+
+    def __init__(self, data):
+        attributes = self.__dict__
+        attributes['_data'] = data
+        converters = self._get_converters()
+        for k, v in data.items():
+            if k in converters:
+                attributes[k] = converters[k](v)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "{} is frozen".format(self.__class__.__name__)
+        )
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            "{} is frozen".format(self.__class__.__name__)
+        )
+
+    def _dump(self):
+        return self._data
+
+    @property
+    def content_hash(self):
+        """
+        A hash of the schema name and data, computed once when first used
+        """
+        try:
+            return self._content_hash
+        except AttributeError:
+            # Named after the mutable type, as generated frozen types are
+            schema_name = getattr(self, 'schema_name', None)
+            if schema_name is None:
+                schema_name = self._mutable_type.__name__
+            # Set through the instance dict as frozen objects can't be set
+            self.__dict__['_content_hash'] = content_hash(
+                [schema_name, self._data]
+            )
+            return self._content_hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, FrozenDynamicObject):
+            return NotImplemented
+        return self.content_hash == other.content_hash
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+    def thaw(self):
+        """
+        Build a mutable copy of the object
+        """
+        return self._mutable_type(self._data)
+
+
+class FrozenArray(Sequence):
+    """
+    An immutable array stored as a tuple, for frozen array types to subclass
+    """
+    _mutable_type = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenArray):
+            return NotImplemented
+        return self._items == other._items
+
+    def __hash__(self):
+        return hash(self._items)
+
+    def _dump(self):
+        return self._data
+
+    def thaw(self):
+        """
+        Build a mutable copy of the array
+        """
+        return self._mutable_type(self._data)
+
+    def __str__(self):
+        return str(list(self._items))
+
+    def __repr__(self):
+        return str(list(self._items))
+
+
+class FrozenTypedArray(FrozenArray):
+    """
+    An immutable array with a specified type for each item
+    """
+    class Meta:
+        base_type = str
+
+    _mutable_type = TypedArray
+
+    def __init__(self, data, **kwargs):
+        self._data = data
+        convert = get_converter(freeze_type(self.Meta.base_type))
+        self._items = tuple(convert(v) for v in data)
+
+
+class FrozenDynamicArray(ItemIndex, FrozenArray):
+    """
+    An immutable array that includes items of different types
+    """
+    _mutable_type = DynamicArray
+
+    def __init__(self, data, **kwargs):
+        self._data = upgrade_items(data)
+        self._items = tuple(self.hydrate_item(v) for v in self._data)
+        self._ids = tuple(v.get('id') for v in self._data)
+
+    @staticmethod
+    def hydrate_item(v):
+        """
+        Convert a typed item into the frozen type for its schema name
+        """
+        v = upgrade_item(v)
+        python_type = get_python_type(schema_name=v['schemaName'])
+        return freeze_type(python_type)(v['data'])
+
+
+_frozen_types = {}
+
+
+def freeze_type(python_type):
+    """
+    Get the frozen variant of a dynamic type, generated once for each type
+
+    Other types, such as scalars, are immutable already and are returned
+    unchanged.
+    """
+    if not isinstance(python_type, type) or issubclass(
+        python_type, (FrozenDynamicObject, FrozenArray)
+    ):
+        return python_type
+    frozen_type = _frozen_types.get(python_type)
+    if frozen_type is not None:
+        return frozen_type
+
+    if issubclass(python_type, DynamicObject):
+        frozen_type = type(
+            'Frozen' + python_type.__name__,
+            (FrozenDynamicObject, python_type),
+            {'_mutable_type': python_type}
+        )
+    elif issubclass(python_type, TypedArray):
+        frozen_type = type(
+            'Frozen' + python_type.__name__,
+            (FrozenTypedArray,),
+            {'Meta': python_type.Meta, '_mutable_type': python_type}
+        )
+    elif issubclass(python_type, DynamicArray):
+        frozen_type = FrozenDynamicArray
+    else:
+        return python_type
+
+    _frozen_types[python_type] = frozen_type
+    return frozen_type
@@ -1,7 +1,23 @@
+import asyncio
+import json
+from operator import attrgetter
+
 from django.contrib.postgres.fields import JSONField
 from django.contrib.postgres.forms import JSONField as JSONFormField
+from django.core.exceptions import ValidationError
 
-from .form_fields import to_schema_field
+from .executors import run_in_executor
+from .field_types import (
+    assign_item_ids,
+    freeze_type,
+    get_data,
+    hydrate_data
+)
+from .form_fields import is_parsed, to_schema_field
+from .instrumentation import timed_call
+from .patch import DocumentPatch, apply_patch
+from .utils import content_hash
+from .validation import get_validator, validate_schema
 from .widgets import JSONEditorWidget
 
 
@@ -10,15 +26,71 @@ class DynamicField(JSONField):
 
     def __init__(self, *args, **kwargs):
         self.schema_field = kwargs.pop("schema_field")
+        self.document_cache = kwargs.pop("document_cache", None)
+        self.intern_table = kwargs.pop("intern_table", None)
+        self.frozen = kwargs.pop("frozen", False)
+        self.executor = kwargs.pop("executor", None)
+        self.validation_executor = kwargs.pop("validation_executor", None)
+        self.editor_page_size = kwargs.pop("editor_page_size", None)
+        self.editor_patch = kwargs.pop("editor_patch", False)
         self.output_type = self.schema_field.Meta.python_type
+        # Cached and interned documents are shared between rows, so they
+        # can't be mutable
+        if self.document_cache is not None or self.intern_table is not None:
+            self.frozen = True
+        if self.frozen:
+            self.output_type = freeze_type(self.output_type)
         super().__init__(*args, **kwargs)
 
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         if self.schema_field is not None:
             kwargs['schema_field'] = self.schema_field
+        if self.frozen:
+            kwargs['frozen'] = True
+        if self.editor_page_size is not None:
+            kwargs['editor_page_size'] = self.editor_page_size
+        if self.editor_patch:
+            kwargs['editor_patch'] = True
         return name, path, args, kwargs
 
+    def pre_save(self, model_instance, add):
+        """
+        Give new dynamic array items a stable ID when the schema uses them
+
+        The data is copied before IDs are added, as it may be shared, and
+        the value with IDs is set on the instance.
+        """
+        value = super().pre_save(model_instance, add)
+        self.pop_previous_data(model_instance)
+        item_ids = getattr(self.schema_field, '_item_ids', False)
+        if value is not None and item_ids:
+            data = get_data(value)
+            data_with_ids = assign_item_ids(data)
+            if data_with_ids is not data:
+                if data is not value:
+                    value = hydrate_data(type(value), data_with_ids)
+                else:
+                    value = data_with_ids
+                setattr(model_instance, self.attname, value)
+        return value
+
+    def get_prep_value(self, value):
+        """
+        Save the data of hydrated values, including any changes made to
+        mutable documents, reusing the parsed data for unchanged parts
+        """
+        return super().get_prep_value(get_data(value))
+
+    def select_format(self, compiler, sql, params):
+        """
+        Select the JSON text rather than the decoded data when caching, so
+        cached documents are found without decoding or hashing the data
+        """
+        if self.document_cache is None:
+            return super().select_format(compiler, sql, params)
+        return '({})::text'.format(sql), params
+
     def from_db_value(self, value, expression, connection):
         """
         Convert the data coming out of the database into the correct type.
@@ -26,26 +98,188 @@ class DynamicField(JSONField):
         if value is None:
             return value
 
-        parsed_value = self.output_type(value)
+        parsed_value = timed_call(
+            self.__class__,
+            'hydrate',
+            self.schema_field.Meta.schema_name,
+            self.hydrate,
+            value,
+            measure=lambda parsed: len(parsed._data)
+        )
 
         return parsed_value
 
+    def hydrate(self, value):
+        """
+        Build the python type for some data, reusing cached documents
+
+        With a document cache the value is the JSON text selected from the
+        database, which is only decoded when the document isn't cached.
+        """
+        if self.document_cache is None or not isinstance(value, str):
+            return self.build(value)
+        return self.document_cache.get(
+            (self.model._meta.label, self.attname),
+            value,
+            lambda content: self.build(json.loads(content))
+        )
+
+    def build(self, value):
+        """
+        Build the python type for some data, sharing interned sub documents
+        """
+        document = self.output_type(value)
+        if self.intern_table is not None:
+            document = self.intern_table.intern(document)
+        return document
+
+    def ahydrate_many(self, values):
+        """
+        Build the python types for many values without blocking the loop
+
+        Returns an awaitable of the list of documents. Documents are built
+        in the field's executor, which must be a thread pool since the
+        generated types can't be sent between processes.
+        """
+        return asyncio.gather(*[
+            run_in_executor(self.executor, self.hydrate, value)
+            for value in values
+        ])
+
+    def pop_previous_data(self, model_instance):
+        """
+        Take the data replaced by a form, so it is only compared with once
+
+        The validator only trusts it if it was found to be valid before.
+        """
+        if model_instance is None:
+            return None
+        return model_instance.__dict__.pop(
+            '_{}_previous'.format(self.attname), None
+        )
+
+    def save_form_data(self, instance, data):
+        """
+        Keep the data being replaced, so only the changes are validated
+
+        A JSON Patch from the editor is applied to the current value, as
+        long as that is still the value the changes were made to, and the
+        result is validated when the model is cleaned.
+        """
+        previous = getattr(instance, self.attname, None)
+        previous_data = get_data(previous)
+        instance.__dict__['_{}_previous'.format(self.attname)] = previous_data
+        if isinstance(data, DocumentPatch):
+            if data.base != content_hash(previous_data):
+                raise ValidationError({
+                    self.name: ValidationError(
+                        "The document was changed while you were editing "
+                        "it. Reload the page and make your changes again.",
+                        code='stale_patch'
+                    )
+                })
+            try:
+                patched = apply_patch(previous_data, data.operations)
+            except ValueError as error:
+                raise ValidationError({
+                    self.name: ValidationError(
+                        "The changes could not be applied: {}".format(error),
+                        code='invalid_patch'
+                    )
+                })
+            data = None
+            if patched is not None:
+                data = hydrate_data(self.output_type, patched)
+        super().save_form_data(instance, data)
+
+    def validate(self, value, model_instance):
+        """
+        Check the data against the JSON Schema as well as the usual checks
+
+        When a form replaced a value known to be valid, only the parts that
+        changed are checked. Large dynamic arrays are checked in chunks in the
+        validation executor when the field has one.
+        """
+        previous = self.pop_previous_data(model_instance)
+        data = get_data(value)
+        if is_parsed(value) and data is value._data:
+            # Data a form parsed from JSON doesn't need to be encoded again
+            # to check it can be saved, unless it was changed since
+            super(JSONField, self).validate(data, model_instance)
+        else:
+            super().validate(data, model_instance)
+        if data is not None:
+            get_validator(self.schema_field).validate(
+                data,
+                executor=self.validation_executor,
+                previous=previous
+            )
+
+    def get_errors(self, value, fail_fast=False, previous=None):
+        """
+        Get the schema errors in a value as lists of messages keyed by JSON
+        pointer, stopping at the first error with fail_fast and checking
+        only the changes from a previous valid value if given
+        """
+        return get_validator(self.schema_field).get_errors(
+            get_data(value),
+            fail_fast=fail_fast,
+            previous=get_data(previous)
+        )
+
+    def is_valid(self, value, previous=None):
+        """
+        Check whether a value matches the schema, stopping at the first error
+        """
+        return not self.get_errors(value, fail_fast=True, previous=previous)
+
+    def avalidate(self, value):
+        """
+        Check the data against the JSON Schema without blocking the loop
+
+        Returns an awaitable that raises a ValidationError for invalid data.
+        The check runs in the field's executor, which may be a thread or
+        process pool.
+        """
+        return run_in_executor(
+            self.executor,
+            validate_schema,
+            self.schema_field.Meta.schema_name,
+            get_data(value)
+        )
+
     def value_to_string(self, obj):
         """
         Convert object to data for data dumps.
         """
         value = self.value_from_object(obj)
-        return value._data
+        return get_data(value)
 
     def formfield(self, **kwargs):
         """
         Provide a JSON Editor Widget to work with the data.
         """
+        schema_name = self.schema_field.Meta.schema_name
+        editor_schema = timed_call(
+            self.__class__,
+            'schema',
+            schema_name,
+            attrgetter('editor_schema'),
+            self.schema_field
+        )
         widget = JSONEditorWidget(
-            self.schema_field.editor_schema,
-            collapsed=False
+            editor_schema,
+            collapsed=False,
+            schema_name=schema_name,
+            page_size=self.editor_page_size,
+            patch=self.editor_patch
         )
-        defaults = {'form_class': JSONFormField, 'widget': widget}
+        defaults = {
+            'form_class': JSONFormField,
+            'widget': widget,
+            'schema_name': schema_name,
+            'python_type': self.output_type
+        }
         defaults.update(kwargs)
         defaults['form_class'] = to_schema_field(defaults['form_class'])
         return super().formfield(**defaults)
@@ -1,14 +1,158 @@
+import json
+from weakref import WeakValueDictionary
+
+from django.core.exceptions import ValidationError
+from django.forms.boundfield import BoundField
+
+from .field_types import get_data, hydrate_data
+from .instrumentation import timed_call
+from .patch import DocumentPatch, apply_patch, check_operation
+from .utils import canonical_json
+from .validation import group_errors
+
+
+# The documents hydrated from submitted JSON, by id, so model fields know
+# they don't need encoding again to check they can be saved
+_parsed_documents = WeakValueDictionary()
+
+
+def is_parsed(value):
+    """
+    Check whether a document was hydrated from JSON submitted to a form
+    """
+    return _parsed_documents.get(id(value)) is value
+
+
+class PatchString(str):
+    """
+    A JSON Patch posted by the widget instead of the whole document, with
+    the content hash of the document it was made to as its base
+    """
+    base = None
+
+
+class DynamicBoundField(BoundField):
+    """
+    A bound field giving its schema errors to the editor widget
+
+    Schema errors are raised when the model is cleaned, and keep their JSON
+    pointers so the widget can show them next to the fields they belong to.
+    The initial value is given too, as the base JSON Patches are made from.
+    """
+    def as_widget(self, widget=None, attrs=None, only_initial=False):
+        widget = widget or self.field.widget
+        widget.base = self.initial
+        widget.errors = group_errors(
+            (error.params['pointer'], error.params['message'])
+            for error in self.errors.as_data()
+            if error.code == 'schema'
+        )
+        return super().as_widget(
+            widget=widget, attrs=attrs, only_initial=only_initial
+        )
+
+
 def to_schema_field(field_class):
     """
     Wraps a field class to ensure that it extracts the data from JSON Schema.
     """
     class DynamicJSONField(field_class):
+        def __init__(self, *args, **kwargs):
+            self.schema_name = kwargs.pop('schema_name', None)
+            self.python_type = kwargs.pop('python_type', None)
+            self._parsed = None
+            super().__init__(*args, **kwargs)
+
+        def to_python(self, value):
+            """
+            Parse the submitted JSON once and hydrate it into the python type
+
+            The hydrated value is given to the model field as it is, so the
+            data isn't encoded and parsed again before it is saved. Data
+            that doesn't fit the python type is left as it is for the model
+            to report schema errors on. A JSON Patch posted instead of the
+            document is kept for the model field to apply.
+            """
+            if hasattr(value, '_data') or isinstance(value, DocumentPatch):
+                return value
+            if self._parsed is not None and self._parsed[0] is value:
+                return self._parsed[1]
+
+            if isinstance(value, PatchString):
+                result = self.parse_patch(value)
+            else:
+                result = super().to_python(value)
+                if result is not None and self.python_type is not None:
+                    result = hydrate_data(self.python_type, result)
+                if hasattr(result, '_data'):
+                    _parsed_documents[id(result)] = result
+            self._parsed = (value, result)
+            return result
+
+        def parse_patch(self, value):
+            """
+            Parse a JSON Patch posted by the widget in place of the document,
+            checking each operation has the members it needs
+            """
+            try:
+                operations = json.loads(value)
+                if not isinstance(operations, list):
+                    raise ValueError("The patch is not a list")
+                for operation in operations:
+                    check_operation(operation)
+            except ValueError:
+                raise ValidationError(
+                    "The changes could not be read", code='invalid_patch'
+                )
+            return DocumentPatch(operations, base=value.base)
+
+        def bound_data(self, data, initial):
+            try:
+                value = self.to_python(data)
+            except ValidationError:
+                return super().bound_data(data, initial)
+            if isinstance(value, DocumentPatch):
+                try:
+                    return apply_patch(initial, value.operations)
+                except ValueError:
+                    return initial
+            return value
+
+        def has_changed(self, initial, data):
+            if self.disabled:
+                return False
+            try:
+                data = self.to_python(data)
+            except ValidationError:
+                return True
+            if isinstance(data, DocumentPatch):
+                return bool(data.operations)
+            return canonical_json(get_data(initial)) != (
+                canonical_json(get_data(data))
+            )
+
+        def clean(self, value):
+            """
+            Time cleaning the submitted data when instrumentation is on
+            """
+            return timed_call(
+                self.__class__,
+                'validate',
+                self.schema_name,
+                super().clean,
+                value,
+                size=len(value) if isinstance(value, str) else None
+            )
+
+        def get_bound_field(self, form, field_name):
+            return DynamicBoundField(form, self, field_name)
+
         def prepare_value(self, value):
             """
             Use the raw field data in the JSON field.
             """
             if value is None:
                 return value
-            return super().prepare_value(getattr(value, '_data', value))
+            return super().prepare_value(get_data(value))
 
     return DynamicJSONField
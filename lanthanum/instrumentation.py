@@ -0,0 +1,83 @@
+from collections import defaultdict
+import threading
+from time import perf_counter
+
+from .signals import timed
+
+
+def timed_call(sender, event, schema_name, function, *args, **kwargs):
+    """
+    Call a function, timing it when any receiver listens for timings
+
+    The size reported with the timing can be given directly, or measured
+    from the result by a measure function. Without receivers this costs a
+    single check.
+    """
+    size = kwargs.pop('size', None)
+    measure = kwargs.pop('measure', None)
+    if not timed.receivers:
+        return function(*args, **kwargs)
+
+    start = perf_counter()
+    result = function(*args, **kwargs)
+    duration = perf_counter() - start
+    timed.send(
+        sender=sender,
+        event=event,
+        schema_name=schema_name,
+        duration=duration,
+        size=measure(result) if measure is not None else size
+    )
+    return result
+
+
+class TimingStats(object):
+    """
+    Totals for one event and schema name
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.size = 0
+
+    def add(self, duration, size):
+        self.count += 1
+        self.duration += duration
+        self.size += size or 0
+
+    def __repr__(self):
+        return "<TimingStats count={} duration={:.6f} size={}>".format(
+            self.count, self.duration, self.size
+        )
+
+
+class TimingCollector(object):
+    """
+    Collect timings into totals keyed by event and schema name
+
+    Connect it for as long as it should collect, e.g. as a context manager:
+
+        with TimingCollector() as collector:
+            ...
+        collector.stats[('hydrate', 'one_of_single_or_album')].duration
+    """
+    def __init__(self):
+        self.stats = defaultdict(TimingStats)
+        self._lock = threading.Lock()
+
+    def receive(self, sender, event, schema_name, duration, size, **kwargs):
+        with self._lock:
+            self.stats[(event, schema_name)].add(duration, size)
+
+    def connect(self):
+        timed.connect(self.receive, weak=False, dispatch_uid=id(self))
+
+    def disconnect(self):
+        timed.disconnect(dispatch_uid=id(self))
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disconnect()
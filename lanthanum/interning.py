@@ -0,0 +1,62 @@
+import threading
+from weakref import WeakValueDictionary
+
+from .field_types import (
+    DynamicArray,
+    DynamicObject,
+    FrozenArray,
+    FrozenDynamicObject,
+    TypedArray
+)
+
+
+class InternTable(object):
+    """
+    Share one instance between identical dynamic objects
+
+    Objects are identified by their type and content hash, so equal sub
+    documents in any number of documents are replaced by the first instance
+    seen while it is still in use elsewhere. Interned objects are shared, so
+    only frozen documents can be interned.
+    """
+    def __init__(self):
+        self._objects = WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def _intern_object(self, instance):
+        # Intern the sub objects first so a new canonical instance only
+        # refers to canonical sub objects
+        for name, value in list(vars(instance).items()):
+            if not name.startswith('_'):
+                interned_value = self.intern(value)
+                if interned_value is not value:
+                    # Set through the instance dict, before the object is
+                    # shared, as frozen objects can't be set
+                    vars(instance)[name] = interned_value
+
+        key = (instance.__class__, instance.content_hash)
+        with self._lock:
+            existing = self._objects.get(key)
+            if existing is not None:
+                return existing
+            self._objects[key] = instance
+        return instance
+
+    def intern(self, value):
+        """
+        Replace identical dynamic objects in a document with shared instances
+        """
+        if isinstance(value, FrozenDynamicObject):
+            return self._intern_object(value)
+        if isinstance(value, (DynamicObject, DynamicArray, TypedArray)):
+            raise TypeError(
+                "Only frozen documents can be interned, not {}".format(
+                    value.__class__.__name__
+                )
+            )
+        if isinstance(value, FrozenArray):
+            value._items = tuple(self.intern(item) for item in value._items)
+        return value
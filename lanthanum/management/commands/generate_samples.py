@@ -0,0 +1,101 @@
+from itertools import islice
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...fields import DynamicField
+from ...samples import SampleGenerator
+
+
+class Command(BaseCommand):
+    help = "Fill a dynamic field of a model with sample documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="The model, as app_label.Model")
+        parser.add_argument('field', help="The dynamic field to fill")
+        parser.add_argument(
+            '--count', type=int, default=100,
+            help="The number of rows to create"
+        )
+        parser.add_argument(
+            '--size', type=int, default=10,
+            help="The number of items in each dynamic array"
+        )
+        parser.add_argument(
+            '--depth', type=int, default=3,
+            help="How deeply to nest objects and arrays"
+        )
+        parser.add_argument(
+            '--optional', type=float, default=0.5,
+            help="The probability of including each optional field"
+        )
+        parser.add_argument('--seed', type=int, help="Seed the generator")
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="The number of rows to insert at a time"
+        )
+        parser.add_argument(
+            '--set', action='append', default=[], metavar='FIELD=VALUE',
+            help=(
+                "Set another field of each row, where {n} in the value is "
+                "replaced with the row number"
+            )
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+        try:
+            field = model._meta.get_field(options['field'])
+        except FieldDoesNotExist as error:
+            raise CommandError(error)
+        if not isinstance(field, DynamicField):
+            raise CommandError(
+                "{} is not a dynamic field".format(options['field'])
+            )
+
+        values = {}
+        for assignment in options['set']:
+            name, separator, value = assignment.partition('=')
+            if not separator:
+                raise CommandError(
+                    "{} should be FIELD=VALUE".format(assignment)
+                )
+            values[name] = value
+
+        generator = SampleGenerator(
+            size=options['size'],
+            depth=options['depth'],
+            optional=options['optional'],
+            seed=options['seed']
+        )
+        documents = enumerate(generator.iter_documents(
+            field.schema_field, options['count']
+        ))
+        with transaction.atomic():
+            # Insert a batch at a time rather than building every row first
+            while True:
+                try:
+                    batch = list(islice(documents, options['batch_size']))
+                except ValueError as error:
+                    raise CommandError(error)
+                rows = [
+                    model(**dict(
+                        {
+                            name: value.format(n=n)
+                            for name, value in values.items()
+                        },
+                        **{field.name: document}
+                    ))
+                    for n, document in batch
+                ]
+                if not rows:
+                    break
+                model.objects.bulk_create(rows)
+        self.stdout.write("Created {} {} rows".format(
+            options['count'], model._meta.label
+        ))
@@ -0,0 +1,232 @@
+from django.db.migrations.operations.base import Operation
+
+from .schema_migrations import SchemaMigrator
+from .search import search_vector_sql
+
+
+class UpgradeSchemaVersion(Operation):
+    """
+    Upgrade stored items of a schema to its current version in a migration
+
+    Batches are committed separately when the migration is not atomic, so
+    set atomic = False on the migration for large tables.
+    """
+    reduces_to_sql = False
+    reversible = False
+    atomic = False
+
+    def __init__(self, model_name, field_name, schema_name, batch_size=1000):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.schema_name = schema_name
+        self.batch_size = batch_size
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'field_name': self.field_name,
+            'schema_name': self.schema_name,
+            'batch_size': self.batch_size
+        }
+        return (self.__class__.__name__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        alias = schema_editor.connection.alias
+        if not self.allow_migrate_model(alias, model):
+            return
+
+        migrator = SchemaMigrator(
+            model,
+            self.field_name,
+            self.schema_name,
+            batch_size=self.batch_size,
+            using=alias
+        )
+        migrator.migrate()
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        raise NotImplementedError(
+            "Schema version upgrades cannot be reversed"
+        )
+
+    def describe(self):
+        return "Upgrade {} items in {}.{}".format(
+            self.schema_name, self.model_name, self.field_name
+        )
+
+
+class AddContainmentIndex(Operation):
+    """
+    Add a GIN index answering jsonb containment (@>) queries on a field
+
+    The index uses the jsonb_path_ops operator class, which is smaller and
+    faster than the default one but only supports containment, as used by
+    the queries in lanthanum.queries and the admin filters.
+    """
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, field_name, name=None):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.name = name
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'field_name': self.field_name
+        }
+        if self.name is not None:
+            kwargs['name'] = self.name
+        return (self.__class__.__name__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_index_name(self, model):
+        if self.name is not None:
+            return self.name
+        column = model._meta.get_field(self.field_name).column
+        return "{}_{}_path_ops".format(model._meta.db_table, column)[-63:]
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        schema_editor.execute(
+            "CREATE INDEX {} ON {} USING gin ({} jsonb_path_ops)".format(
+                schema_editor.quote_name(self.get_index_name(model)),
+                schema_editor.quote_name(model._meta.db_table),
+                schema_editor.quote_name(
+                    model._meta.get_field(self.field_name).column
+                )
+            )
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        schema_editor.execute("DROP INDEX IF EXISTS {}".format(
+            schema_editor.quote_name(self.get_index_name(model))
+        ))
+
+    def describe(self):
+        return "Add a containment index on {}.{}".format(
+            self.model_name, self.field_name
+        )
+
+
+class AddSearchVector(Operation):
+    """
+    Keep a tsvector column filled from the text fields of a dynamic field
+
+    A trigger sets the vector whenever a row is inserted or its document
+    is updated, from the text found at the schema's char and text field
+    paths with their weights, and existing rows are filled in. Add the
+    operation again in a later migration to pick up changes to the schema.
+    Needs PostgreSQL 12 or later.
+    """
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, field_name, vector_field_name,
+                 config='english', weights=None):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.vector_field_name = vector_field_name
+        self.config = config
+        self.weights = weights
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'field_name': self.field_name,
+            'vector_field_name': self.vector_field_name
+        }
+        if self.config != 'english':
+            kwargs['config'] = self.config
+        if self.weights is not None:
+            kwargs['weights'] = self.weights
+        return (self.__class__.__name__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def get_trigger_name(self, model):
+        return "{}_{}_search".format(
+            model._meta.db_table,
+            model._meta.get_field(self.vector_field_name).column
+        )[-63:]
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        quote_name = schema_editor.quote_name
+        field = model._meta.get_field(self.field_name)
+        table = quote_name(model._meta.db_table)
+        column = quote_name(field.column)
+        vector_column = quote_name(
+            model._meta.get_field(self.vector_field_name).column
+        )
+        name = quote_name(self.get_trigger_name(model))
+
+        vector_sql, params = search_vector_sql(
+            field.schema_field, 'NEW.{}'.format(column), self.config,
+            self.weights
+        )
+        schema_editor.execute(
+            "CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ "
+            "BEGIN NEW.{vector} := {vector_sql}; RETURN NEW; END "
+            "$$ LANGUAGE plpgsql".format(
+                name=name, vector=vector_column, vector_sql=vector_sql
+            ),
+            params
+        )
+        schema_editor.execute(
+            "DROP TRIGGER IF EXISTS {name} ON {table}".format(
+                name=name, table=table
+            )
+        )
+        schema_editor.execute(
+            "CREATE TRIGGER {name} BEFORE INSERT OR UPDATE OF {column} "
+            "ON {table} FOR EACH ROW EXECUTE PROCEDURE {name}()".format(
+                name=name, column=column, table=table
+            )
+        )
+
+        vector_sql, params = search_vector_sql(
+            field.schema_field, column, self.config, self.weights
+        )
+        schema_editor.execute(
+            "UPDATE {table} SET {vector} = {vector_sql}".format(
+                table=table, vector=vector_column, vector_sql=vector_sql
+            ),
+            params
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        name = schema_editor.quote_name(self.get_trigger_name(model))
+        schema_editor.execute("DROP TRIGGER IF EXISTS {} ON {}".format(
+            name, schema_editor.quote_name(model._meta.db_table)
+        ))
+        schema_editor.execute("DROP FUNCTION IF EXISTS {}()".format(name))
+
+    def describe(self):
+        return "Fill {}.{} from the text of {}".format(
+            self.model_name, self.vector_field_name, self.field_name
+        )
@@ -0,0 +1,453 @@
+from bisect import bisect_left
+from copy import copy, deepcopy
+
+from .field_types import get_data
+from .schema_fields import ArrayField, DynamicArrayField, ObjectField
+from .utils import same_data
+
+
+def _escape(token):
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _diff_object(old, new, sub_fields, pointer, operations):
+    """
+    Compare the keys of two objects, recursing into known sub fields
+    """
+    for key, old_value in old.items():
+        key_pointer = "{}/{}".format(pointer, _escape(key))
+        if key not in new:
+            operations.append({'op': 'remove', 'path': key_pointer})
+        else:
+            _diff_value(
+                old_value, new[key], sub_fields.get(key), key_pointer,
+                operations
+            )
+    for key, new_value in new.items():
+        if key not in old:
+            operations.append({
+                'op': 'add',
+                'path': "{}/{}".format(pointer, _escape(key)),
+                'value': new_value
+            })
+
+
+def _diff_item(old, new, item_fields, pointer, operations):
+    """
+    Compare two typed items of a dynamic array
+
+    Items of the same schema are compared by their data, while an item
+    replaced by one of another schema is replaced as a whole.
+    """
+    if not (isinstance(old, dict) and isinstance(new, dict)) or (
+        old.get('schemaName') != new.get('schemaName')
+    ):
+        operations.append({'op': 'replace', 'path': pointer, 'value': new})
+        return
+    item_field = item_fields.get(new.get('schemaName'))
+    _diff_object(old, new, {'data': item_field}, pointer, operations)
+
+
+def _get_item_ids(items):
+    """
+    Get the IDs of typed items, or None unless every item has a unique ID
+    """
+    item_ids = []
+    for item in items:
+        item_id = item.get('id') if isinstance(item, dict) else None
+        if not item_id:
+            return None
+        item_ids.append(item_id)
+    if len(set(item_ids)) != len(item_ids):
+        return None
+    return item_ids
+
+
+def _increasing_run(values):
+    """
+    Find a longest increasing subsequence of distinct values
+    """
+    tails = []
+    tail_indexes = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        length = bisect_left(tails, value)
+        if length:
+            previous[i] = tail_indexes[length - 1]
+        if length == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[length] = value
+            tail_indexes[length] = i
+
+    run = []
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        run.append(values[i])
+        i = previous[i]
+    return run[::-1]
+
+
+class _Slots(object):
+    """
+    Count the filled slots before a slot, in logarithmic time
+    """
+    def __init__(self, size):
+        self._counts = [0] * (size + 1)
+
+    def fill(self, slot, change=1):
+        i = slot + 1
+        while i < len(self._counts):
+            self._counts[i] += change
+            i += i & -i
+
+    def count_before(self, slot):
+        total = 0
+        i = slot
+        while i > 0:
+            total += self._counts[i]
+            i -= i & -i
+        return total
+
+
+def _diff_identified(old, new, old_ids, new_ids, compare_items, pointer,
+                     start, operations):
+    """
+    Compare items matched by their IDs, moving items that were reordered
+
+    The longest run of items that kept their order stays in place and every
+    other item is moved once. Each item has a slot for where it was and one
+    for where it goes, laid out in advance, so its position at each step is
+    a count of the filled slots before it.
+    """
+    kept_ids = set(new_ids)
+    for i in reversed(range(len(old))):
+        if old_ids[i] not in kept_ids:
+            operations.append({
+                'op': 'remove',
+                'path': "{}/{}".format(pointer, start + i)
+            })
+
+    old_items = dict(zip(old_ids, old))
+    kept = [item_id for item_id in old_ids if item_id in kept_ids]
+    kept_positions = {item_id: i for i, item_id in enumerate(kept)}
+    staying = {
+        kept[position] for position in _increasing_run([
+            kept_positions[item_id]
+            for item_id in new_ids if item_id in kept_positions
+        ])
+    }
+
+    # Items that move or are added go after the item staying before them
+    placed_after = {}
+    anchor = None
+    for item_id in new_ids:
+        if item_id in staying:
+            anchor = item_id
+        else:
+            placed_after.setdefault(anchor, []).append(item_id)
+    old_slots = {}
+    new_slots = {}
+    for item_id in [None] + kept:
+        if item_id is not None:
+            old_slots[item_id] = len(old_slots) + len(new_slots)
+        for placed_id in placed_after.get(item_id, ()):
+            new_slots[placed_id] = len(old_slots) + len(new_slots)
+
+    slots = _Slots(len(old_slots) + len(new_slots))
+    for slot in old_slots.values():
+        slots.fill(slot)
+    for item_id, new_item in zip(new_ids, new):
+        if item_id in staying:
+            position = slots.count_before(old_slots[item_id])
+        else:
+            if item_id in old_slots:
+                origin = slots.count_before(old_slots[item_id])
+                slots.fill(old_slots[item_id], -1)
+            position = slots.count_before(new_slots[item_id])
+            slots.fill(new_slots[item_id])
+            item_pointer = "{}/{}".format(pointer, start + position)
+            if item_id not in old_slots:
+                operations.append({
+                    'op': 'add', 'path': item_pointer, 'value': new_item
+                })
+                continue
+            if origin != position:
+                operations.append({
+                    'op': 'move',
+                    'from': "{}/{}".format(pointer, start + origin),
+                    'path': item_pointer
+                })
+        if not same_data(old_items[item_id], new_item):
+            compare_items(
+                old_items[item_id], new_item,
+                "{}/{}".format(pointer, start + position), operations
+            )
+
+
+def _diff_array(old, new, compare_items, pointer, operations,
+                identified=False):
+    """
+    Compare two arrays in linear time
+
+    The same items at the start and end are skipped, the items left are
+    compared in place, and then the extra items are added or removed. When
+    the items are identified and all have IDs they are matched by ID
+    instead, so reordered items are moved rather than rewritten.
+    """
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and same_data(old[start], new[start]):
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and (
+        same_data(old[old_end - 1], new[new_end - 1])
+    ):
+        old_end -= 1
+        new_end -= 1
+    old_middle = old[start:old_end]
+    new_middle = new[start:new_end]
+
+    if identified:
+        old_ids = _get_item_ids(old_middle)
+        new_ids = _get_item_ids(new_middle)
+        if old_ids is not None and new_ids is not None:
+            _diff_identified(
+                old_middle, new_middle, old_ids, new_ids, compare_items,
+                pointer, start, operations
+            )
+            return
+
+    for i, (old_item, new_item) in enumerate(zip(old_middle, new_middle)):
+        if not same_data(old_item, new_item):
+            compare_items(
+                old_item, new_item, "{}/{}".format(pointer, start + i),
+                operations
+            )
+
+    common = min(len(old_middle), len(new_middle))
+    for _ in range(len(old_middle) - common):
+        operations.append({
+            'op': 'remove',
+            'path': "{}/{}".format(pointer, start + common)
+        })
+    for i, new_item in enumerate(new_middle[common:]):
+        operations.append({
+            'op': 'add',
+            'path': "{}/{}".format(pointer, start + common + i),
+            'value': new_item
+        })
+
+
+def _diff_value(old, new, schema_field, pointer, operations):
+    if same_data(old, new):
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        if isinstance(schema_field, DynamicArrayField):
+            item_fields = {
+                field.Meta.schema_name: field
+                for field in schema_field._allowed_fields
+            }
+
+            def compare_items(old_item, new_item, item_pointer, operations):
+                _diff_item(
+                    old_item, new_item, item_fields, item_pointer, operations
+                )
+        else:
+            base_field = None
+            if isinstance(schema_field, ArrayField):
+                base_field = schema_field._base_field
+
+            def compare_items(old_item, new_item, item_pointer, operations):
+                _diff_value(
+                    old_item, new_item, base_field, item_pointer, operations
+                )
+        _diff_array(
+            old, new, compare_items, pointer, operations,
+            identified=isinstance(schema_field, DynamicArrayField)
+        )
+    elif isinstance(old, dict) and isinstance(new, dict):
+        sub_fields = {}
+        if isinstance(schema_field, ObjectField):
+            sub_fields = schema_field._sub_fields
+        _diff_object(old, new, sub_fields, pointer, operations)
+    else:
+        operations.append({'op': 'replace', 'path': pointer, 'value': new})
+
+
+def diff(old, new, schema_field):
+    """
+    Build a JSON Patch of the changes from one document to another
+
+    Documents may be hydrated values or their data. Objects are compared by
+    the sub fields of the schema and dynamic array items by their schema
+    name and position, so an edit deep in a large document produces a
+    single small operation. Arrays are compared in linear time by skipping
+    the equal items at each end, which finds single insertions and removals.
+    Dynamic array items with stable IDs are matched by ID, so reordered
+    items give move operations.
+    """
+    operations = []
+    _diff_value(get_data(old), get_data(new), schema_field, '', operations)
+    return operations
+
+
+# The members each kind of operation needs besides its op and path
+OPERATION_MEMBERS = {
+    'add': ['value'],
+    'remove': [],
+    'replace': ['value'],
+    'move': ['from'],
+    'copy': ['from'],
+    'test': ['value'],
+}
+
+
+def check_operation(operation):
+    """
+    Check that a JSON Patch operation has a known op and the members it
+    needs, raising a ValueError if not
+    """
+    if not isinstance(operation, dict):
+        raise ValueError("{!r} is not a patch operation".format(operation))
+    op = operation.get('op')
+    if not isinstance(op, str) or op not in OPERATION_MEMBERS:
+        raise ValueError("{!r} is not a patch operation".format(op))
+    for member in ['path'] + OPERATION_MEMBERS[op]:
+        if member not in operation:
+            raise ValueError("{} has no {}".format(op, member))
+        if member != 'value' and not isinstance(operation[member], str):
+            raise ValueError("The {} of {} is not a JSON pointer".format(
+                member, op
+            ))
+
+
+def _parse_pointer(pointer):
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise ValueError("{} is not a JSON pointer".format(pointer))
+    return [_unescape(token) for token in pointer.split('/')[1:]]
+
+
+def _parse_key(container, token, adding=False):
+    if isinstance(container, list):
+        if adding and token == '-':
+            return len(container)
+        try:
+            index = int(token)
+        except ValueError:
+            raise ValueError("{} is not an array index".format(token))
+        if not 0 <= index <= len(container) - (0 if adding else 1):
+            raise ValueError("{} is out of range".format(token))
+        return index
+    if not isinstance(container, dict):
+        raise ValueError("{} cannot be looked up".format(token))
+    if not adding and token not in container:
+        raise ValueError("{} does not exist".format(token))
+    return token
+
+
+class _Patcher(object):
+    """
+    Apply operations to data, copying each container on a path only once
+    """
+    def __init__(self, data):
+        self.root = {'': data}
+        self._copies = {id(self.root): self.root}
+
+    def _writable(self, container, key):
+        child = container[key]
+        if id(child) not in self._copies:
+            child = copy(child)
+            container[key] = child
+            self._copies[id(child)] = child
+        return child
+
+    def _locate(self, pointer, adding=False):
+        """
+        Find the writable parent and key of the value at a pointer
+        """
+        tokens = _parse_pointer(pointer)
+        container, key = self.root, ''
+        for i, token in enumerate(tokens):
+            container = self._writable(container, key)
+            key = _parse_key(
+                container, token, adding=adding and i == len(tokens) - 1
+            )
+        return container, key
+
+    def get(self, pointer):
+        container, key = self._locate(pointer)
+        return container[key]
+
+    def add(self, pointer, value):
+        container, key = self._locate(pointer, adding=True)
+        if isinstance(container, list):
+            container.insert(key, value)
+        else:
+            container[key] = value
+
+    def remove(self, pointer):
+        container, key = self._locate(pointer)
+        value = container[key]
+        del container[key]
+        return value
+
+    def replace(self, pointer, value):
+        container, key = self._locate(pointer)
+        container[key] = value
+
+    def apply(self, operation):
+        check_operation(operation)
+        op = operation['op']
+        path = operation['path']
+        if op == 'add':
+            self.add(path, operation['value'])
+        elif op == 'remove':
+            self.remove(path)
+        elif op == 'replace':
+            self.replace(path, operation['value'])
+        elif op == 'move':
+            self.add(path, self.remove(operation['from']))
+        elif op == 'copy':
+            self.add(path, deepcopy(self.get(operation['from'])))
+        elif op == 'test':
+            if self.get(path) != operation['value']:
+                raise ValueError("{} does not match".format(path))
+
+
+def apply_patch(document, patch):
+    """
+    Apply a JSON Patch to a document and return the new data
+
+    The document, which may be a hydrated value or its data, is not changed.
+    Only the objects and arrays on the paths of the operations are copied,
+    and the rest of the data is shared with the original. Invalid
+    operations raise a ValueError.
+    """
+    patcher = _Patcher(get_data(document))
+    for operation in patch:
+        patcher.apply(operation)
+    return patcher.root['']
+
+
+class DocumentPatch(object):
+    """
+    Changes to apply to the current value of a field when a form is saved
+
+    The base is the content hash of the document the changes were made to,
+    so changes to a document that has since changed can be refused.
+    """
+    def __init__(self, operations, base=None):
+        self.operations = operations
+        self.base = base
+
+    def __repr__(self):
+        return "<DocumentPatch: {} operations>".format(len(self.operations))
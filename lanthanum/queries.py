@@ -0,0 +1,63 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from .columns import _resolve_path
+from .field_types import get_converter, to_bool
+from .schema_fields import DynamicArrayField
+
+
+def _to_json_value(value, python_type):
+    """
+    Convert a value, such as a query string parameter, to its JSON type
+    """
+    try:
+        if python_type is bool:
+            return to_bool(value)
+        if python_type is Decimal:
+            # Decimals are stored as JSON numbers
+            return float(get_converter(Decimal)(value))
+        return get_converter(python_type)(value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError("{!r} is not a valid {}".format(
+            value, python_type.__name__
+        ))
+
+
+def block_query(field_name, schema_name):
+    """
+    Match documents with an item of a schema name in a dynamic array
+
+    The query uses jsonb containment (@>), so a GIN index on the field
+    can answer it.
+    """
+    return Q(**{
+        '{}__contains'.format(field_name): [{'schemaName': schema_name}]
+    })
+
+
+def value_query(model, field_name, path, value):
+    """
+    Match documents with a value at a schema path
+
+    Paths are written as for extract_column, such as "single.artist", or
+    "*.title" for any item schema with a title. The value is converted to
+    the type of the field at the path, raising a ValueError if it doesn't
+    fit, and matched with jsonb containment (@>) so a GIN index on the
+    field can answer the query.
+    """
+    schema_field = model._meta.get_field(field_name).schema_field
+    is_array = isinstance(schema_field, DynamicArrayField)
+    lookup = '{}__contains'.format(field_name)
+
+    query = Q()
+    for schema_name, json_path, python_type in _resolve_path(
+        schema_field, path
+    ):
+        contained = _to_json_value(value, python_type)
+        for key in reversed(json_path):
+            contained = {key: contained}
+        if is_array:
+            contained = [dict(contained, schemaName=schema_name)]
+        query |= Q(**{lookup: contained})
+    return query
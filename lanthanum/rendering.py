@@ -0,0 +1,98 @@
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .field_types import get_data
+from .utils import content_hash
+
+
+class BlockRenderer(object):
+    """
+    Render the items of a dynamic array with a template per schema name
+
+    Templates are found once for each schema name, as
+    "<template_dir>/<schema_name>.html", and rendered with the item as
+    "block". The HTML of each block is cached in the Django cache under a
+    hash of the block's data, the template directory and the extra context,
+    so a block appearing unchanged on any page is only rendered once. Cached
+    blocks must therefore only depend on their own data and the extra
+    context, not on the page they appear in, and the extra context must be
+    JSON serializable.
+    """
+    def __init__(
+        self,
+        template_dir='lanthanum/blocks',
+        cache_alias='default',
+        timeout=DEFAULT_TIMEOUT,
+        key_prefix='lanthanum.block'
+    ):
+        self.template_dir = template_dir
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self._templates = {}
+
+    def get_template(self, schema_name):
+        """
+        Get the compiled template for a schema name
+        """
+        try:
+            return self._templates[schema_name]
+        except KeyError:
+            template = get_template(
+                "{}/{}.html".format(self.template_dir, schema_name)
+            )
+            self._templates[schema_name] = template
+            return template
+
+    def get_context_hash(self, context=None):
+        """
+        Hash the template directory and the extra context blocks share
+        """
+        try:
+            return content_hash([self.template_dir, context or {}])
+        except TypeError:
+            raise TypeError(
+                "The context of cached blocks must be JSON serializable"
+            )
+
+    def get_cache_key(self, block, context_hash=None):
+        if context_hash is None:
+            context_hash = self.get_context_hash()
+        return "{}:{}:{}:{}".format(
+            self.key_prefix,
+            block.schema_name,
+            context_hash,
+            content_hash(get_data(block))
+        )
+
+    def render_block(self, block, context=None):
+        """
+        Render a single block without the cache
+        """
+        block_context = dict(context or {})
+        block_context['block'] = block
+        return self.get_template(block.schema_name).render(block_context)
+
+    def render(self, blocks, context=None):
+        """
+        Render each block, reusing cached HTML where possible
+        """
+        cache = caches[self.cache_alias]
+        context_hash = self.get_context_hash(context)
+        keys = [self.get_cache_key(block, context_hash) for block in blocks]
+        fragments = cache.get_many(keys)
+
+        rendered = {}
+        for key, block in zip(keys, blocks):
+            if key not in fragments and key not in rendered:
+                rendered[key] = self.render_block(block, context)
+        if rendered:
+            cache.set_many(rendered, timeout=self.timeout)
+            fragments.update(rendered)
+
+        return mark_safe(''.join(fragments[key] for key in keys))
+
+
+default_renderer = BlockRenderer()
@@ -0,0 +1,232 @@
+import random
+
+from .schema_fields import (
+    ArrayField,
+    BooleanField,
+    CharField,
+    DecimalField,
+    DynamicArrayField,
+    Field,
+    IntegerField,
+    ObjectField,
+    TextField
+)
+from .utils import canonical_json
+
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam '
+    'quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo '
+    'consequat duis aute irure in reprehenderit voluptate velit esse cillum '
+    'fugiat nulla pariatur excepteur sint occaecat cupidatat non proident '
+    'sunt culpa qui officia deserunt mollit anim id est laborum'
+).split()
+
+# The number of times a duplicate item of a unique array is built again
+UNIQUE_ATTEMPTS = 100
+
+
+class SampleGenerator(object):
+    """
+    Generate random documents that are valid for a schema field
+
+    Each schema field is compiled once into a function building its data,
+    so generating many documents only walks the field tree once. Dynamic
+    arrays get size items, within their min and max items, and nesting
+    stops at depth: deeper arrays get their minimum number of items and
+    optional fields are left out. Duplicate items of unique arrays are
+    built again, and a ValueError is raised if too few unique items can be
+    built. Optional fields are included with the
+    optional probability, and a seed makes the documents repeatable.
+    """
+    def __init__(self, size=10, depth=3, text_length=40, optional=0.5,
+                 seed=None):
+        self.size = size
+        self.depth = depth
+        self.text_length = text_length
+        self.optional = optional
+        self.random = random.Random(seed)
+        self._compiled = {}
+
+    def generate(self, schema_field):
+        """
+        Generate a document for a schema field
+        """
+        return self.compile(schema_field, self.depth)()
+
+    def iter_documents(self, schema_field, count):
+        """
+        Generate count documents for a schema field
+        """
+        build = self.compile(schema_field, self.depth)
+        for _ in range(count):
+            yield build()
+
+    def compile(self, schema_field, depth):
+        """
+        Get the function building data for a field at a depth
+        """
+        key = (id(schema_field), depth)
+        try:
+            return self._compiled[key]
+        except KeyError:
+            pass
+        for field_class, method_name in self.compilers:
+            if isinstance(schema_field, field_class):
+                build = getattr(self, method_name)(schema_field, depth)
+                break
+        else:
+            raise TypeError("Samples can't be generated for {}".format(
+                schema_field.__class__.__name__
+            ))
+        self._compiled[key] = build
+        return build
+
+    def compile_text(self, min_length, max_length):
+        rng = self.random
+        min_length = min_length or 0
+        max_length = max_length or max(self.text_length, min_length)
+
+        def build():
+            length = rng.randint(min_length, max_length)
+            words = []
+            total = -1
+            while total < length:
+                word = rng.choice(WORDS)
+                words.append(word)
+                total += len(word) + 1
+            return ' '.join(words)[:length]
+        return build
+
+    def compile_char(self, schema_field, depth):
+        if schema_field._choices:
+            values = [value for (value, label) in schema_field._choices]
+            return lambda: self.random.choice(values)
+        min_length = schema_field._min_length
+        if schema_field._required and min_length is None:
+            min_length = 1
+        return self.compile_text(min_length, schema_field._max_length)
+
+    def compile_string(self, schema_field, depth):
+        return self.compile_text(1 if schema_field._required else 0, None)
+
+    def compile_textarea(self, schema_field, depth):
+        return self.compile_text(
+            1 if schema_field._required else 0, self.text_length * 5
+        )
+
+    def compile_boolean(self, schema_field, depth):
+        return lambda: self.random.random() < 0.5
+
+    def compile_integer(self, schema_field, depth):
+        return lambda: self.random.randint(0, 1000)
+
+    def compile_decimal(self, schema_field, depth):
+        return lambda: round(self.random.uniform(0, 1000), 2)
+
+    def compile_object(self, schema_field, depth):
+        rng = self.random
+        optional = self.optional if depth > 0 else 0
+        sub_fields = [
+            (
+                name,
+                sub_field._required,
+                self.compile(sub_field, depth - 1)
+            )
+            for name, sub_field in schema_field._sub_fields.items()
+        ]
+
+        def build():
+            return {
+                name: build_value()
+                for name, required, build_value in sub_fields
+                if required or rng.random() < optional
+            }
+        return build
+
+    def compile_array(self, schema_field, depth):
+        rng = self.random
+        size = self.size if depth > 0 else 0
+        build_item = self.compile(schema_field._base_field, depth - 1)
+
+        def build():
+            return [build_item() for _ in range(rng.randint(0, size))]
+        return build
+
+    def compile_dynamic_array(self, schema_field, depth):
+        rng = self.random
+        size = self.size if depth > 0 else 0
+        if schema_field._min_items is not None:
+            size = max(size, schema_field._min_items)
+        if schema_field._max_items is not None:
+            size = min(size, schema_field._max_items)
+        item_ids = schema_field._item_ids
+
+        builders = []
+        for item_field in schema_field._allowed_fields:
+            meta = item_field.Meta
+            wrapper = {'schemaName': meta.schema_name}
+            if meta.schema_version is not None:
+                wrapper['schemaVersion'] = meta.schema_version
+            builders.append(
+                (wrapper, self.compile(item_field, depth - 1))
+            )
+
+        def build_item():
+            wrapper, build_data = rng.choice(builders)
+            item = dict(wrapper, data=build_data())
+            if item_ids:
+                item['id'] = '{:032x}'.format(rng.getrandbits(128))
+            return item
+
+        if not schema_field._unique_items or item_ids:
+            # Random IDs already make the items unique
+            def build():
+                return [build_item() for _ in range(size)]
+            return build
+
+        min_items = schema_field._min_items or 0
+
+        def build_unique():
+            items = []
+            seen = set()
+            attempts = 0
+            while len(items) < size and attempts < UNIQUE_ATTEMPTS:
+                item = build_item()
+                key = canonical_json(item)
+                if key in seen:
+                    attempts += 1
+                    continue
+                seen.add(key)
+                items.append(item)
+            if len(items) < min_items:
+                raise ValueError(
+                    "{} unique items couldn't be generated for {}".format(
+                        min_items, schema_field.Meta.schema_name
+                    )
+                )
+            return items
+        return build_unique
+
+    # Checked in order, so subclasses come before the fields they extend
+    compilers = [
+        (CharField, 'compile_char'),
+        (TextField, 'compile_textarea'),
+        (BooleanField, 'compile_boolean'),
+        (IntegerField, 'compile_integer'),
+        (DecimalField, 'compile_decimal'),
+        (ObjectField, 'compile_object'),
+        (DynamicArrayField, 'compile_dynamic_array'),
+        (ArrayField, 'compile_array'),
+        (Field, 'compile_string'),
+    ]
+
+
+def generate_documents(schema_field, count, **kwargs):
+    """
+    Generate a list of sample documents for a schema field
+
+    Keyword arguments configure the SampleGenerator.
+    """
+    return list(SampleGenerator(**kwargs).iter_documents(schema_field, count))
@@ -18,6 +18,8 @@ class Field(object):
         schema_type = 'string'
         schema_format = 'text'
         schema_name = 'field'
+        schema_version = None
+        upgrades = {}
         abstract = True
 
         @classmethod
@@ -78,13 +80,13 @@ class Field(object):
             schema['default'] = self._default
         return schema
 
-    @property
-    def typed_schema(self):
+    def get_typed_schema(self, item_id=False):
         """
         Add data typing to the schema by wrapping it with metadata
 
         This is useful for validating OneOf Schemas because it includes the
-        schema type as a constant.
+        schema type as a constant. With item_id the wrapper also holds a
+        stable ID for the item, assigned when it is first saved.
         """
         schema = {
             'type': 'object',
@@ -103,10 +105,33 @@ class Field(object):
             "defaultProperties": ["data", "schemaName"],
             "required": ['data', 'schemaName']
         }
+        if self.Meta.schema_version is not None:
+            # Items saved before a version was set are treated as version 1
+            schema['properties']['schemaVersion'] = {
+                'title': 'Schema Version',
+                'type': 'integer',
+                'default': self.Meta.schema_version,
+                'options': {'hidden': True}
+            }
+            schema['defaultProperties'].append('schemaVersion')
+        if item_id:
+            schema['properties']['id'] = {
+                'title': 'ID',
+                'type': 'string',
+                'options': {'hidden': True}
+            }
+            schema['defaultProperties'].append('id')
         if self._label is not None:
             schema['title'] = self._label
         return schema
 
+    @property
+    def typed_schema(self):
+        """
+        The schema wrapped with its schema name
+        """
+        return self.get_typed_schema()
+
     @property
     def editor_schema(self):
         """
@@ -114,15 +139,18 @@ class Field(object):
         """
         return self.schema
 
-    @property
-    def typed_editor_schema(self):
+    def get_typed_editor_schema(self, item_id=False):
         """
         The typed schema prepared for json editor
         """
-        schema = self.typed_schema
+        schema = self.get_typed_schema(item_id=item_id)
         schema['properties']['data'] = self.editor_schema
         return schema
 
+    @property
+    def typed_editor_schema(self):
+        return self.get_typed_editor_schema()
+
 
 class CharField(Field):
     """
@@ -496,6 +524,7 @@ class DynamicArrayField(Field):
         self._max_items = kwargs.get("max_items")
         self._min_items = kwargs.get("min_items")
         self._item_label = kwargs.get("item_label", "Item")
+        self._item_ids = kwargs.get("item_ids", False)
 
     @property
     def schema(self):
@@ -504,7 +533,10 @@ class DynamicArrayField(Field):
         schema['items'] = {
             'title': self._item_label,
             'headerTemplate': "{} {{{{i1}}}}.".format(self._item_label),
-            'oneOf': [field.typed_schema for field in self._allowed_fields]
+            'oneOf': [
+                field.get_typed_schema(item_id=self._item_ids)
+                for field in self._allowed_fields
+            ]
         }
 
         if self._unique_items is not None:
@@ -519,6 +551,7 @@ class DynamicArrayField(Field):
     def editor_schema(self):
         schema = self.schema
         schema['items']['oneOf'] = [
-            field.typed_editor_schema for field in self._allowed_fields
+            field.get_typed_editor_schema(item_id=self._item_ids)
+            for field in self._allowed_fields
         ]
         return schema
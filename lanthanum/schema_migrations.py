@@ -0,0 +1,206 @@
+import json
+import logging
+
+from django.db import connections, transaction
+
+from .schema_fields import DynamicArrayField
+from .transforms import (
+    INITIAL_VERSION,
+    get_item_version,
+    get_schema_version,
+    get_transforms
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaMigrator(object):
+    """
+    Upgrade typed items stored in a dynamic field in batches
+
+    Each version step is applied with a single UPDATE per batch when all of
+    its transforms can be expressed in SQL, and otherwise by loading each
+    batch and upgrading it in python. Only rows that still contain items at
+    an older version are selected, and each batch is committed on its own,
+    so an interrupted run can simply be started again. Rows are visited in
+    primary key order, so disjoint ranges can also be run by separate
+    workers using start_after and stop_at.
+    """
+    def __init__(
+        self,
+        model,
+        field_name,
+        schema_name,
+        batch_size=1000,
+        using='default'
+    ):
+        field = model._meta.get_field(field_name)
+        if not isinstance(field.schema_field, DynamicArrayField):
+            raise ValueError(
+                "Schema versions are stored with dynamic array items, "
+                "{} is not a dynamic array field".format(field_name)
+            )
+
+        self.schema_name = schema_name
+        self.batch_size = batch_size
+        self.using = using
+        self.connection = connections[using]
+
+        quote_name = self.connection.ops.quote_name
+        self.table = quote_name(model._meta.db_table)
+        self.pk_column = quote_name(model._meta.pk.column)
+        self.column = quote_name(field.column)
+
+    def _batch_sql(self):
+        """
+        Select the next batch of rows holding items at a given version
+        """
+        return (
+            "SELECT {pk} FROM {table} "
+            "WHERE ({pk} > %s OR %s IS NULL) "
+            "AND ({pk} <= %s OR %s IS NULL) "
+            "AND {column} @> %s::jsonb "
+            "AND EXISTS ("
+            "SELECT 1 FROM jsonb_array_elements({column}) AS element(item) "
+            "WHERE item->>'schemaName' = %s "
+            "AND COALESCE((item->>'schemaVersion')::int, {initial}) = %s"
+            ") ORDER BY {pk} LIMIT %s"
+        ).format(
+            pk=self.pk_column,
+            table=self.table,
+            column=self.column,
+            initial=INITIAL_VERSION
+        )
+
+    def _batch_params(self, version, start_after, stop_at):
+        return [
+            start_after,
+            start_after,
+            stop_at,
+            stop_at,
+            json.dumps([{'schemaName': self.schema_name}]),
+            self.schema_name,
+            version,
+            self.batch_size
+        ]
+
+    def _sql_step(self, cursor, version, transforms, start_after, stop_at):
+        """
+        Upgrade a batch of rows in the database, returning the last pk
+        """
+        data_sql, data_params = "item->'data'", []
+        for transform in transforms:
+            data_sql, data_params = transform.as_sql(data_sql, data_params)
+
+        sql = (
+            "WITH batch AS ({batch}) "
+            "UPDATE {table} SET {column} = ("
+            "SELECT jsonb_agg("
+            "CASE WHEN item->>'schemaName' = %s "
+            "AND COALESCE((item->>'schemaVersion')::int, {initial}) = %s "
+            "THEN jsonb_set(item, '{{data}}', {data}) || "
+            "jsonb_build_object('schemaVersion', %s) "
+            "ELSE item END ORDER BY position) "
+            "FROM jsonb_array_elements({table}.{column}) "
+            "WITH ORDINALITY AS element(item, position)"
+            ") FROM batch WHERE {table}.{pk} = batch.{pk} "
+            "RETURNING {table}.{pk}"
+        ).format(
+            batch=self._batch_sql(),
+            table=self.table,
+            column=self.column,
+            pk=self.pk_column,
+            initial=INITIAL_VERSION,
+            data=data_sql
+        )
+        params = (
+            self._batch_params(version, start_after, stop_at) +
+            [self.schema_name, version] +
+            data_params +
+            [version + 1]
+        )
+        cursor.execute(sql, params)
+        return max((pk for (pk,) in cursor.fetchall()), default=None)
+
+    def _python_step(self, cursor, version, transforms, start_after, stop_at):
+        """
+        Upgrade a batch of rows in python, returning the last pk
+        """
+        cursor.execute(
+            "SELECT {pk}, {column}::text FROM {table} "
+            "WHERE {pk} IN ({batch}) ORDER BY {pk}".format(
+                pk=self.pk_column,
+                column=self.column,
+                table=self.table,
+                batch=self._batch_sql()
+            ),
+            self._batch_params(version, start_after, stop_at)
+        )
+        rows = cursor.fetchall()
+
+        updates = []
+        for pk, value in rows:
+            items = json.loads(value)
+            for item in items:
+                if (
+                    item['schemaName'] == self.schema_name and
+                    get_item_version(item) == version
+                ):
+                    data = item['data']
+                    for transform in transforms:
+                        data = transform.apply(data)
+                    item['data'] = data
+                    item['schemaVersion'] = version + 1
+            updates.append((json.dumps(items), pk))
+
+        cursor.executemany(
+            "UPDATE {table} SET {column} = %s::jsonb WHERE {pk} = %s".format(
+                table=self.table,
+                column=self.column,
+                pk=self.pk_column
+            ),
+            updates
+        )
+        return rows[-1][0] if rows else None
+
+    def migrate(self, start_after=None, stop_at=None):
+        """
+        Upgrade every stored item of the schema to the current version
+        """
+        current_version = get_schema_version(self.schema_name)
+        for version in range(INITIAL_VERSION, current_version):
+            transforms = get_transforms(self.schema_name, version)
+            if all(
+                transform.as_sql('', []) is not None
+                for transform in transforms
+            ):
+                step = self._sql_step
+            else:
+                step = self._python_step
+
+            last_pk = start_after
+            while True:
+                with transaction.atomic(using=self.using):
+                    with self.connection.cursor() as cursor:
+                        last_pk = step(
+                            cursor, version, transforms, last_pk, stop_at
+                        )
+                if last_pk is None:
+                    break
+                logger.info(
+                    "Upgraded %s items to version %s up to pk %s",
+                    self.schema_name,
+                    version + 1,
+                    last_pk
+                )
+
+
+def migrate_schema(model, field_name, schema_name, **kwargs):
+    """
+    Upgrade every stored item of a schema in a dynamic field
+    """
+    start_after = kwargs.pop('start_after', None)
+    stop_at = kwargs.pop('stop_at', None)
+    migrator = SchemaMigrator(model, field_name, schema_name, **kwargs)
+    migrator.migrate(start_after=start_after, stop_at=stop_at)
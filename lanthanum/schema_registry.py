@@ -1,9 +1,16 @@
 schema_registry = {}
 
 
+def get_schema_field(schema_name):
+    """
+    Get the schema field registered for a given schema name
+    """
+    return schema_registry[schema_name]
+
+
 def get_python_type(schema_name):
     """
     Get the python type for a given schema name
     """
-    field = schema_registry[schema_name]
+    field = get_schema_field(schema_name)
     return field.Meta.python_type
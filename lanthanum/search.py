@@ -0,0 +1,104 @@
+import json
+
+from .schema_fields import (
+    ArrayField,
+    CharField,
+    DynamicArrayField,
+    ObjectField,
+    TextField
+)
+
+
+# The weight of each kind of text field, from A (highest) to D
+DEFAULT_WEIGHTS = {
+    CharField: 'A',
+    TextField: 'B'
+}
+
+
+def _quote_key(key):
+    return '."{}"'.format(key.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def _iter_text_fields(schema_field, path, json_path):
+    """
+    Walk a field tree, yielding the path, json path and field of each text
+    field
+
+    Char fields with choices hold codes rather than content, so are left
+    out.
+    """
+    if isinstance(schema_field, DynamicArrayField):
+        for item_field in schema_field._allowed_fields:
+            schema_name = item_field.Meta.schema_name
+            yield from _iter_text_fields(
+                item_field,
+                path + [schema_name],
+                '{}[*] ? (@.schemaName == {}).data'.format(
+                    json_path, json.dumps(schema_name)
+                )
+            )
+    elif isinstance(schema_field, ArrayField):
+        yield from _iter_text_fields(
+            schema_field._base_field, path, json_path + '[*]'
+        )
+    elif isinstance(schema_field, ObjectField):
+        for name, sub_field in schema_field._sub_fields.items():
+            yield from _iter_text_fields(
+                sub_field, path + [name], json_path + _quote_key(name)
+            )
+    elif isinstance(schema_field, TextField) or (
+        isinstance(schema_field, CharField) and not schema_field._choices
+    ):
+        yield '.'.join(path), json_path, schema_field
+
+
+def get_text_paths(schema_field, weights=None):
+    """
+    Find the text fields of a schema, as (path, json path, weight) tuples
+
+    Paths are written as for extract_column, such as "single.title", and
+    json paths are SQL/JSON paths for jsonb_path_query. Weights default by
+    the kind of field, and can be set for each path, or set to None to
+    leave a path out of the search.
+    """
+    weights = weights or {}
+    text_paths = []
+    for path, json_path, field in _iter_text_fields(schema_field, [], '$'):
+        weight = weights.get(path, DEFAULT_WEIGHTS.get(type(field), 'D'))
+        if weight is not None:
+            text_paths.append((path, json_path, weight))
+    return text_paths
+
+
+def search_vector_sql(schema_field, document, config='english',
+                      weights=None):
+    """
+    Build an SQL expression for the weighted tsvector of a document
+
+    The document is an SQL expression for the jsonb data, such as a column
+    name. The text at each path is found with jsonb_path_query, which needs
+    PostgreSQL 12 or later. Returns the SQL and its parameters.
+    """
+    by_weight = {}
+    for path, json_path, weight in get_text_paths(schema_field, weights):
+        by_weight.setdefault(weight, []).append(json_path)
+
+    parts = []
+    params = []
+    for weight, json_paths in sorted(by_weight.items()):
+        texts = ' UNION ALL '.join(
+            'SELECT jsonb_path_query({}, %s::jsonpath)'.format(document)
+            for _ in json_paths
+        )
+        parts.append(
+            "setweight(to_tsvector(%s::regconfig, coalesce(("
+            "SELECT string_agg(value #>> '{{}}', ' ') "
+            "FROM ({}) AS texts(value)"
+            "), '')), %s)".format(texts)
+        )
+        params.extend([config] + json_paths + [weight])
+
+    if not parts:
+        return "''::tsvector", []
+    return ' || '.join(parts), params
@@ -0,0 +1,382 @@
+import copy
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+
+from .schema_fields import ArrayField, DynamicArrayField, Field, ObjectField
+
+
+# Formats only used to choose json editor inputs
+EDITOR_FORMATS = {'text', 'textarea', 'checkbox', 'number', 'table', 'tabs'}
+
+# Schema keywords only used by json editor
+EDITOR_KEYWORDS = {
+    'defaultProperties',
+    'enumSource',
+    'headerTemplate',
+    'options',
+    'template'
+}
+
+_serializers = {}
+_deserializers = {}
+_openapi_components = {}
+
+
+def _join(path, key):
+    return "{}/{}".format(path, key)
+
+
+def _is_scalar(field):
+    return not isinstance(field, (ArrayField, DynamicArrayField, ObjectField))
+
+
+def _compile_serializer(field):
+    """
+    Build a function copying the declared parts of stored data
+    """
+    if isinstance(field, DynamicArrayField):
+        item_serializers = {
+            allowed_field.Meta.schema_name: get_serializer(allowed_field)
+            for allowed_field in field._allowed_fields
+        }
+
+        item_ids = field._item_ids
+
+        def serialize_item(item):
+            serialized_item = {
+                'schemaName': item['schemaName'],
+                'data': item_serializers[item['schemaName']](item['data'])
+            }
+            if item_ids and item.get('id'):
+                serialized_item['id'] = item['id']
+            return serialized_item
+
+        def serialize_dynamic_array(data):
+            return [serialize_item(item) for item in data]
+        return serialize_dynamic_array
+
+    if isinstance(field, ArrayField):
+        base_serializer = get_serializer(field._base_field)
+
+        def serialize_array(data):
+            return [base_serializer(item) for item in data]
+        return serialize_array
+
+    if isinstance(field, ObjectField):
+        # Scalars are stored as their JSON values, so they are copied as is
+        sub_serializers = [
+            (
+                name,
+                None if _is_scalar(sub_field) else get_serializer(sub_field)
+            )
+            for name, sub_field in field._sub_fields.items()
+        ]
+
+        def serialize_object(data):
+            result = {}
+            for name, sub_serializer in sub_serializers:
+                value = data.get(name)
+                if value is not None:
+                    result[name] = (
+                        value if sub_serializer is None
+                        else sub_serializer(value)
+                    )
+            return result
+        return serialize_object
+
+    def serialize_scalar(value):
+        return value
+    return serialize_scalar
+
+
+def _check_scalar(field, value, path):
+    """
+    Check a scalar value against its field and return the python value
+    """
+    python_type = field.Meta.python_type
+    if python_type is str:
+        if not isinstance(value, str):
+            raise ValidationError("{}: expected a string".format(path))
+        if field._required and not value:
+            raise ValidationError("{}: this field is required".format(path))
+        choices = getattr(field, '_choices', None)
+        if choices and value not in [choice for (choice, label) in choices]:
+            raise ValidationError(
+                "{}: {!r} is not a valid choice".format(path, value)
+            )
+        min_length = getattr(field, '_min_length', None)
+        if min_length and len(value) < min_length:
+            raise ValidationError("{}: too short".format(path))
+        max_length = getattr(field, '_max_length', None)
+        if max_length and len(value) > max_length:
+            raise ValidationError("{}: too long".format(path))
+        return value
+
+    if python_type is bool:
+        if not isinstance(value, bool):
+            raise ValidationError("{}: expected a boolean".format(path))
+        return value
+
+    if python_type is int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValidationError("{}: expected an integer".format(path))
+        return value
+
+    if python_type is Decimal:
+        if isinstance(value, bool) or not isinstance(
+            value, (int, float, Decimal)
+        ):
+            raise ValidationError("{}: expected a number".format(path))
+        return value
+
+    return python_type(value)
+
+
+def _compile_deserializer(field):
+    """
+    Build a function checking submitted data and returning data to store
+    """
+    if isinstance(field, DynamicArrayField):
+        item_deserializers = {
+            allowed_field.Meta.schema_name: get_deserializer(allowed_field)
+            for allowed_field in field._allowed_fields
+        }
+        item_versions = {
+            allowed_field.Meta.schema_name: allowed_field.Meta.schema_version
+            for allowed_field in field._allowed_fields
+        }
+        min_items = field._min_items
+        max_items = field._max_items
+        item_ids = field._item_ids
+
+        def deserialize_dynamic_array(data, path=''):
+            if not isinstance(data, list):
+                raise ValidationError("{}: expected a list".format(path))
+            if min_items is not None and len(data) < min_items:
+                raise ValidationError("{}: too few items".format(path))
+            if max_items is not None and len(data) > max_items:
+                raise ValidationError("{}: too many items".format(path))
+
+            items = []
+            for i, item in enumerate(data):
+                item_path = _join(path, i)
+                try:
+                    schema_name = item['schemaName']
+                    item_deserializer = item_deserializers[schema_name]
+                except (KeyError, TypeError):
+                    raise ValidationError(
+                        "{}: unknown schema name".format(item_path)
+                    )
+                deserialized_item = {
+                    'schemaName': schema_name,
+                    'data': item_deserializer(
+                        item.get('data'), _join(item_path, 'data')
+                    )
+                }
+                if item_versions[schema_name] is not None:
+                    deserialized_item['schemaVersion'] = (
+                        item_versions[schema_name]
+                    )
+                item_id = item.get('id')
+                if item_ids and item_id:
+                    if not isinstance(item_id, str):
+                        raise ValidationError(
+                            "{}: expected a string".format(
+                                _join(item_path, 'id')
+                            )
+                        )
+                    deserialized_item['id'] = item_id
+                items.append(deserialized_item)
+            return items
+        return deserialize_dynamic_array
+
+    if isinstance(field, ArrayField):
+        base_deserializer = get_deserializer(field._base_field)
+
+        def deserialize_array(data, path=''):
+            if not isinstance(data, list):
+                raise ValidationError("{}: expected a list".format(path))
+            return [
+                base_deserializer(item, _join(path, i))
+                for i, item in enumerate(data)
+            ]
+        return deserialize_array
+
+    if isinstance(field, ObjectField):
+        sub_deserializers = {
+            name: (sub_field, get_deserializer(sub_field))
+            for name, sub_field in field._sub_fields.items()
+        }
+
+        def deserialize_object(data, path=''):
+            if not isinstance(data, dict):
+                raise ValidationError("{}: expected an object".format(path))
+            for name in data:
+                if name not in sub_deserializers:
+                    raise ValidationError(
+                        "{}: unexpected field".format(_join(path, name))
+                    )
+
+            result = {}
+            for name, (sub_field, sub_deserializer) in (
+                sub_deserializers.items()
+            ):
+                value = data.get(name)
+                if value is None:
+                    value = sub_field._default
+                if value is None:
+                    if sub_field._required:
+                        raise ValidationError(
+                            "{}: this field is required".format(
+                                _join(path, name)
+                            )
+                        )
+                    continue
+                result[name] = sub_deserializer(value, _join(path, name))
+            return result
+        return deserialize_object
+
+    def deserialize_scalar(value, path=''):
+        return _check_scalar(field, value, path)
+    return deserialize_scalar
+
+
+def get_serializer(field):
+    """
+    Get a compiled function converting stored data for output
+
+    Only the sub fields declared on the schema are copied, straight from the
+    raw data, so no dynamic objects are built along the way.
+    """
+    try:
+        return _serializers[field]
+    except KeyError:
+        serializer = _serializers[field] = _compile_serializer(field)
+        return serializer
+
+
+def get_deserializer(field):
+    """
+    Get a compiled function checking submitted data before it is stored
+
+    The function takes the data and an optional JSON pointer prefix, and
+    raises a ValidationError naming the pointer of the first problem.
+    """
+    try:
+        return _deserializers[field]
+    except KeyError:
+        deserializer = _deserializers[field] = _compile_deserializer(field)
+        return deserializer
+
+
+def _clean_schema(schema):
+    """
+    Remove json editor details from a schema for use in OpenAPI
+    """
+    cleaned = {
+        key: value
+        for key, value in schema.items()
+        if key not in EDITOR_KEYWORDS
+    }
+    if cleaned.get('format') in EDITOR_FORMATS:
+        del cleaned['format']
+    if cleaned.get('type') == 'decimal':
+        cleaned['type'] = 'number'
+    return cleaned
+
+
+def _reference(name):
+    return {'$ref': '#/components/schemas/{}'.format(name)}
+
+
+def _openapi_schema(field, components):
+    """
+    Build the OpenAPI schema for a field, adding components for its types
+    """
+    name = field.Meta.schema_name
+
+    if isinstance(field, DynamicArrayField):
+        if name not in components:
+            mapping = {}
+            for allowed_field in field._allowed_fields:
+                item_name = "{}_item".format(allowed_field.Meta.schema_name)
+                item_schema = {
+                    'type': 'object',
+                    'properties': {
+                        'schemaName': {
+                            'type': 'string',
+                            'enum': [allowed_field.Meta.schema_name]
+                        },
+                        'data': _openapi_schema(allowed_field, components)
+                    },
+                    'required': ['schemaName', 'data']
+                }
+                if allowed_field.Meta.schema_version is not None:
+                    item_schema['properties']['schemaVersion'] = {
+                        'type': 'integer'
+                    }
+                if field._item_ids:
+                    item_schema['properties']['id'] = {'type': 'string'}
+                components[item_name] = item_schema
+                mapping[allowed_field.Meta.schema_name] = (
+                    _reference(item_name)['$ref']
+                )
+
+            schema = _clean_schema(Field.schema.fget(field))
+            if field._unique_items is not None:
+                schema['uniqueItems'] = field._unique_items
+            if field._min_items is not None:
+                schema['minItems'] = field._min_items
+            if field._max_items is not None:
+                schema['maxItems'] = field._max_items
+            schema['items'] = {
+                'oneOf': [{'$ref': ref} for ref in mapping.values()],
+                'discriminator': {
+                    'propertyName': 'schemaName',
+                    'mapping': mapping
+                }
+            }
+            components[name] = schema
+        return _reference(name)
+
+    if isinstance(field, ObjectField):
+        if name not in components:
+            # Reserve the name first in case the schema refers to itself
+            components[name] = {}
+            schema = _clean_schema(Field.schema.fget(field))
+            schema['properties'] = {}
+            for sub_name, sub_field in field._sub_fields.items():
+                sub_schema = _openapi_schema(sub_field, components)
+                if '$ref' not in sub_schema:
+                    sub_schema['title'] = sub_name.title().replace("_", " ")
+                schema['properties'][sub_name] = sub_schema
+            if field._required_field_names:
+                schema['required'] = list(field._required_field_names)
+            components[name] = schema
+        return _reference(name)
+
+    if isinstance(field, ArrayField):
+        schema = _clean_schema(field.schema)
+        schema['items'] = _openapi_schema(field._base_field, components)
+        return schema
+
+    return _clean_schema(field.schema)
+
+
+def openapi_components(*fields):
+    """
+    Build OpenAPI components for the schemas of the given fields
+
+    Each object field and dynamic array becomes a named component, so
+    schemas shared between fields are only described once. The components
+    are built once for each set of fields and copied for each caller.
+    """
+    try:
+        components = _openapi_components[fields]
+    except KeyError:
+        components = {}
+        for field in fields:
+            _openapi_schema(field, components)
+        _openapi_components[fields] = components
+    return {'schemas': copy.deepcopy(components)}
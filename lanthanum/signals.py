@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent after timed work on schema data, such as hydrating, validating or
+# rendering, when at least one receiver is connected.
+timed = Signal(providing_args=['event', 'schema_name', 'duration', 'size'])
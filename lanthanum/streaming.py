@@ -0,0 +1,142 @@
+import codecs
+import json
+
+from .field_types import DynamicArray
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+
+
+class _ArrayReader(object):
+    """
+    Buffered reader that decodes a top level JSON array one item at a time
+
+    Only the unparsed remainder of the stream is held in memory, so the
+    memory used is bounded by the size of the largest item rather than the
+    size of the document.
+    """
+    def __init__(self, stream, chunk_size):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = None
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+
+    def _read(self, size):
+        """
+        Append up to size characters from the stream to the buffer
+        """
+        if self._eof:
+            return False
+
+        chunk = self._stream.read(size)
+        while isinstance(chunk, bytes):
+            if self._text_decoder is None:
+                self._text_decoder = codecs.getincrementaldecoder(
+                    'utf-8-sig'
+                )()
+            text = self._text_decoder.decode(chunk, final=not chunk)
+            if text or not chunk:
+                chunk = text
+            else:
+                # The chunk ended part way through a multi-byte character
+                chunk = self._stream.read(size)
+
+        if not chunk:
+            self._eof = True
+            return False
+
+        # Drop anything already consumed before growing the buffer
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _peek(self):
+        """
+        Skip whitespace and return the next character, or None at the end
+        """
+        while True:
+            buffer = self._buffer
+            position = self._position
+            length = len(buffer)
+            while position < length and buffer[position] in WHITESPACE:
+                position += 1
+            self._position = position
+            if position < length:
+                return buffer[position]
+            if not self._read(self._chunk_size):
+                return None
+
+    def _expect(self, characters):
+        character = self._peek()
+        if character is None or character not in characters:
+            raise ValueError(
+                "Expected one of {!r} at offset {} of the JSON stream, "
+                "found {!r}".format(characters, self._position, character)
+            )
+        self._position += 1
+        return character
+
+    def _decode_value(self):
+        """
+        Decode the next complete value, reading more data until it fits
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._position
+                )
+            except ValueError:
+                value, end = None, None
+
+            # A value ending exactly at the end of the buffer could be a
+            # truncated number or literal, so only trust it at the end of
+            # the stream.
+            if end is not None and (end < len(self._buffer) or self._eof):
+                self._position = end
+                return value
+
+            # Read at least as much again as is pending so that large items
+            # are decoded in a linear number of attempts.
+            pending = len(self._buffer) - self._position
+            if not self._read(max(self._chunk_size, pending)):
+                if end is not None:
+                    self._position = end
+                    return value
+                raise ValueError(
+                    "Incomplete JSON value at the end of the stream"
+                )
+
+    def __iter__(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._position += 1
+            return
+
+        while True:
+            yield self._decode_value()
+            if self._expect(',]') == ']':
+                return
+
+
+def iter_json_array(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the items of a JSON array from a text or binary stream
+    """
+    return iter(_ArrayReader(stream, chunk_size))
+
+
+def iter_dynamic_array(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield hydrated dynamic array items from a text or binary stream
+
+    Each item is converted into the python type registered for its schema
+    name as soon as it has been read, without loading the whole document.
+    """
+    for item in iter_json_array(stream, chunk_size=chunk_size):
+        yield DynamicArray.hydrate_item(item)
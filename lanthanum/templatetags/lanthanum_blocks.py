@@ -0,0 +1,14 @@
+from django import template
+
+from ..rendering import default_renderer
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_blocks(blocks):
+    """
+    Render the items of a dynamic array with a template per schema name
+    """
+    return default_renderer.render(blocks)
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from lanthanum.fields import DynamicField
 
@@ -11,3 +12,13 @@ class RecordShop(models.Model):
         blank=True,
         null=True
     )
+
+
+class RecordLabel(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    catalog = DynamicField(
+        schema_field=music_catalog_field,
+        blank=True,
+        null=True
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
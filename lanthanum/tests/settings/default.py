@@ -17,14 +17,34 @@ DATABASES = {
 
 
 INSTALLED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.messages',
+    'django.contrib.sessions',
     'lanthanum',
     'lanthanum.tests.mock_app'
 )
 
 
+# The editor schema view is only served to staff users
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'APP_DIRS': True
     },
 ]
+
+
+# The mock app's URLs leave editors embedding their schemas, and tests
+# sharing schemas between editors use lanthanum.tests.urls
+
+ROOT_URLCONF = 'lanthanum.tests.mock_app.urls'
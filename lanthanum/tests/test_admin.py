@@ -0,0 +1,154 @@
+from django.apps import apps
+from django.contrib.admin import ModelAdmin, site
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.state import ProjectState
+from django.test import RequestFactory
+import pytest
+
+from .. import admin
+from ..admin import DynamicSearchMixin, block_filter, value_filter
+from ..operations import AddContainmentIndex
+from .mock_app.models import RecordShop
+
+
+@pytest.fixture
+def record_shops(db):
+    RecordShop.objects.create(name='HMV', catalog=[
+        {'schemaName': 'single', 'data': {'title': 'A', 'artist': 'Odie'}},
+        {'schemaName': 'album', 'data': {'title': 'B'}}
+    ])
+    RecordShop.objects.create(name='Virgin', catalog=[
+        {'schemaName': 'single', 'data': {'title': 'B', 'artist': 'Odie'}},
+        {'schemaName': 'single', 'data': {'title': 'C', 'artist': 'Garfield'}}
+    ])
+    RecordShop.objects.create(name='Our Price', catalog=[])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def model_admin():
+    return ModelAdmin(RecordShop, site)
+
+
+def filter_names(list_filter, model_admin, params):
+    request = RequestFactory().get('/', params)
+    shop_filter = list_filter(
+        request, dict(params), RecordShop, model_admin
+    )
+    queryset = shop_filter.queryset(request, RecordShop.objects.all())
+    return shop_filter, sorted(shop.name for shop in queryset)
+
+
+def test_block_filter(record_shops, model_admin):
+    shop_filter, names = filter_names(
+        block_filter('catalog'), model_admin, {'catalog_block': 'album'}
+    )
+    assert shop_filter.title == "catalog block"
+    assert [value for value, label in shop_filter.lookup_choices] == [
+        'single', 'album'
+    ]
+    assert names == ['HMV']
+
+
+def test_value_filter(record_shops, model_admin):
+    shop_filter, names = filter_names(
+        value_filter('catalog', 'single.artist'), model_admin,
+        {'catalog_single_artist': 'Odie'}
+    )
+    assert shop_filter.title == "single artist"
+    assert shop_filter.lookup_choices == [
+        ('Odie', 'Odie'), ('Garfield', 'Garfield')
+    ]
+    assert names == ['HMV', 'Virgin']
+
+    shop_filter, names = filter_names(
+        value_filter('catalog', '*.title', choices=[('B', 'Bee')]),
+        model_admin, {'catalog_any_title': 'B'}
+    )
+    assert shop_filter.lookup_choices == [('B', 'Bee')]
+    assert names == ['HMV', 'Virgin']
+
+
+def test_value_filter_caches_counts(record_shops, model_admin, monkeypatch):
+    calls = []
+
+    def counting(*args):
+        calls.append(args)
+        return count_values(*args)
+    count_values = admin.count_values
+    monkeypatch.setattr(admin, 'count_values', counting)
+
+    list_filter = value_filter('catalog', 'single.artist')
+    for _ in range(2):
+        shop_filter, names = filter_names(list_filter, model_admin, {})
+        assert shop_filter.lookup_choices == [
+            ('Odie', 'Odie'), ('Garfield', 'Garfield')
+        ]
+    assert len(calls) == 1
+
+    cache.clear()
+    list_filter = value_filter('catalog', 'single.artist', cache_timeout=0)
+    for _ in range(2):
+        filter_names(list_filter, model_admin, {})
+    assert len(calls) == 3
+
+
+def test_value_query_uses_containment(record_shops, model_admin):
+    request = RequestFactory().get('/')
+    shop_filter = value_filter('catalog', 'single.title')(
+        request, {'catalog_single_title': 'A'}, RecordShop, model_admin
+    )
+    queryset = shop_filter.queryset(request, RecordShop.objects.all())
+    assert '@>' in str(queryset.query)
+
+    with pytest.raises(IncorrectLookupParameters):
+        value_filter('catalog', 'single.label', choices=[])(
+            request, {'catalog_single_label': 'EMI'}, RecordShop,
+            model_admin
+        ).queryset(request, RecordShop.objects.all())
+
+
+def test_dynamic_search(record_shops):
+    class RecordShopAdmin(DynamicSearchMixin, ModelAdmin):
+        search_fields = ['name']
+        dynamic_search_fields = [('catalog', 'single.artist')]
+
+    model_admin = RecordShopAdmin(RecordShop, site)
+    request = RequestFactory().get('/')
+
+    def search(term):
+        queryset, use_distinct = model_admin.get_search_results(
+            request, RecordShop.objects.all(), term
+        )
+        return sorted(shop.name for shop in queryset)
+
+    assert search('Garfield') == ['Virgin']
+    assert search('Our') == ['Our Price']
+    assert search('') == ['HMV', 'Our Price', 'Virgin']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_add_containment_index():
+    def index_names():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                [RecordShop._meta.db_table]
+            )
+            return {name for (name,) in cursor.fetchall()}
+
+    operation = AddContainmentIndex('RecordShop', 'catalog')
+    state = ProjectState.from_apps(apps)
+    with connection.schema_editor() as schema_editor:
+        operation.database_forwards('mock_app', schema_editor, state, state)
+    assert 'mock_app_recordshop_catalog_path_ops' in index_names()
+
+    with connection.schema_editor() as schema_editor:
+        operation.database_backwards('mock_app', schema_editor, state, state)
+    assert 'mock_app_recordshop_catalog_path_ops' not in index_names()
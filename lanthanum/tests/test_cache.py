@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from ..cache import DocumentCache
+from ..field_types import freeze_type
+from ..fields import DynamicField
+from .mock_app.models import RecordShop
+
+
+class TestDocumentCache:
+    def test_hits_and_misses(self):
+        cache = DocumentCache()
+        first = cache.get('ns', '{"a": 1, "b": 2}', json.loads)
+        second = cache.get('ns', '{"a": 1, "b": 2}', json.loads)
+        third = cache.get('other', '{"a": 1, "b": 2}', json.loads)
+
+        assert second is first
+        assert third is not first
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+        assert stats['documents'] == 2
+
+    def test_evicts_least_recently_used(self):
+        cache = DocumentCache(max_size=14)
+        a = cache.get('ns', '{"a":1}', json.loads)
+        cache.get('ns', '{"b":1}', json.loads)
+        cache.get('ns', '{"a":1}', json.loads)
+        cache.get('ns', '{"c":1}', json.loads)
+
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['size'] == 14
+        assert cache.get('ns', '{"a":1}', json.loads) is a
+        assert cache.stats()['hits'] == 2
+
+    def test_large_documents_are_not_cached(self):
+        cache = DocumentCache(max_size=4)
+        cache.get('ns', '{"a":1}', json.loads)
+        assert cache.stats()['documents'] == 0
+
+
+@pytest.mark.django_db
+def test_field_document_cache(monkeypatch):
+    cache = DocumentCache()
+    field = RecordShop._meta.get_field('catalog')
+    monkeypatch.setattr(field, 'document_cache', cache)
+    monkeypatch.setattr(field, 'output_type', freeze_type(field.output_type))
+
+    catalog = [{'schemaName': 'album', 'data': {'title': 'Dogs'}}]
+    RecordShop.objects.create(name='HMV', catalog=catalog)
+    RecordShop.objects.create(name='Virgin', catalog=catalog)
+
+    hmv, virgin = RecordShop.objects.order_by('name')
+    assert hmv.catalog is virgin.catalog
+    assert hmv.catalog[0].title == 'Dogs'
+    assert cache.stats()['hits'] == 1
+    assert isinstance(hmv.catalog, field.output_type)
+    assert RecordShop.objects.values_list('catalog', flat=True)[0] == (
+        hmv.catalog
+    )
+
+
+def test_cached_field_is_frozen():
+    schema_field = RecordShop._meta.get_field('catalog').schema_field
+    field = DynamicField(
+        schema_field=schema_field, document_cache=DocumentCache()
+    )
+    assert field.frozen
+    assert field.output_type is freeze_type(schema_field.Meta.python_type)
@@ -0,0 +1,70 @@
+from array import array
+from decimal import Decimal
+
+import pytest
+
+from ..cache import DocumentCache
+from ..columns import _to_column, count_values, extract_column
+from ..field_types import freeze_type
+from .mock_app.models import RecordShop
+
+
+@pytest.fixture
+def record_shops():
+    RecordShop.objects.create(name='HMV', catalog=[
+        {'schemaName': 'single', 'data': {'title': 'A', 'artist': 'Snoopy'}},
+        {'schemaName': 'album', 'data': {'title': 'B'}},
+        {'schemaName': 'single', 'data': {'title': 'C'}}
+    ])
+    RecordShop.objects.create(name='Virgin', catalog=[
+        {'schemaName': 'single', 'data': {'title': 'D', 'artist': 'Snoopy'}},
+        {'schemaName': 'single', 'data': {'title': 'E', 'artist': 'Odie'}}
+    ])
+    RecordShop.objects.create(name='OurPrice', catalog=None)
+
+
+@pytest.mark.django_db
+class TestExtractColumn:
+    def test_single_schema(self, record_shops):
+        columns = extract_column(
+            RecordShop.objects.all(), 'catalog', 'single.artist'
+        )
+        assert sorted(columns['single']) == ['Odie', 'Snoopy', 'Snoopy']
+        assert list(columns) == ['single']
+
+    def test_all_schemas(self, record_shops):
+        columns = extract_column(
+            RecordShop.objects.filter(name='HMV'), 'catalog', '*.title'
+        )
+        assert sorted(columns['single']) == ['A', 'C']
+        assert columns['album'] == ['B']
+
+    def test_unknown_path(self, record_shops):
+        with pytest.raises(ValueError):
+            extract_column(RecordShop.objects.all(), 'catalog', 'single.x')
+
+    def test_count_values(self, record_shops):
+        counts = count_values(
+            RecordShop.objects.all(), 'catalog', 'single.artist'
+        )
+        assert counts == {'single': {'Snoopy': 2, 'Odie': 1}}
+
+    def test_document_cache(self, record_shops, monkeypatch):
+        # Fields with a document cache select the JSON text of documents
+        field = RecordShop._meta.get_field('catalog')
+        monkeypatch.setattr(field, 'document_cache', DocumentCache())
+        monkeypatch.setattr(
+            field, 'output_type', freeze_type(field.output_type)
+        )
+        columns = extract_column(
+            RecordShop.objects.all(), 'catalog', 'single.artist'
+        )
+        assert sorted(columns['single']) == ['Odie', 'Snoopy', 'Snoopy']
+        assert count_values(
+            RecordShop.objects.all(), 'catalog', 'single.artist'
+        ) == {'single': {'Snoopy': 2, 'Odie': 1}}
+
+
+def test_numeric_column():
+    assert _to_column([1, 2], int, False) == array('q', [1, 2])
+    assert _to_column([Decimal('1.5')], Decimal, False) == array('d', [1.5])
@@ -0,0 +1,119 @@
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from .mock_app.models import RecordShop
+
+
+# Runs the editor's scripts against a stand in for JSON Editor and the
+# page, submitting the form before and after loading every page of items
+HARNESS = r"""
+const vm = require('vm');
+const scripts = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+
+const elements = {};
+const form = {
+  listeners: {},
+  addEventListener(type, listener) { this.listeners[type] = listener; }
+};
+function getElementById(id) {
+  if (!elements[id]) {
+    elements[id] = {
+      style: {},
+      value: '',
+      listeners: {},
+      addEventListener(type, listener) { this.listeners[type] = listener; },
+      closest() { return form; }
+    };
+  }
+  return elements[id];
+}
+
+const rows = [];
+class JSONEditor {
+  constructor(container, options) {
+    this.value = [];
+    this.options = options;
+    this.root = {showValidationErrors() {}};
+  }
+  on() {}
+  setValue(value) { this.value = value.slice(); }
+  getValue() { return this.value.slice(); }
+  validate() { return []; }
+  getEditor() {
+    const editor = this;
+    return {
+      addRow(item) {
+        rows.push(item);
+        editor.value.push(item);
+      }
+    };
+  }
+}
+JSONEditor.plugins = {sceditor: {}};
+
+const context = vm.createContext({
+  JSONEditor, console, setTimeout, clearTimeout,
+  document: {getElementById}
+});
+context.window = context;
+scripts.forEach(script => vm.runInContext(script, context));
+
+const textarea = getElementById('id_catalog');
+form.listeners.submit();
+const early = JSON.parse(textarea.value);
+
+const loadMore = getElementById('catalog_load_more');
+const steps = [];
+function step() {
+  steps.push({
+    shown: context.catalog_editor.value.length,
+    button: loadMore.style.display === 'none' ? null : loadMore.textContent
+  });
+}
+step();
+while (loadMore.style.display !== 'none') {
+  loadMore.listeners.click();
+  step();
+}
+form.listeners.submit();
+console.log(JSON.stringify({
+  steps, rows, early, submitted: JSON.parse(textarea.value)
+}));
+"""
+
+
+@pytest.mark.skipif(
+    shutil.which('node') is None, reason="Node.js is not installed"
+)
+def test_paged_editor_loads_rows(monkeypatch):
+    field = RecordShop._meta.get_field('catalog')
+    monkeypatch.setattr(field, 'editor_page_size', 2)
+    catalog = [
+        {'schemaName': 'album', 'data': {'title': str(i)}} for i in range(5)
+    ]
+
+    html = field.formfield().widget.render(
+        name='catalog', value=json.dumps(catalog)
+    )
+    scripts = re.findall(r'<script>(.*?)</script>', html, re.DOTALL)
+    result = json.loads(subprocess.run(
+        ['node', '-e', HARNESS],
+        input=json.dumps(scripts).encode('utf-8'),
+        stdout=subprocess.PIPE,
+        check=True
+    ).stdout)
+
+    assert result['steps'] == [
+        {'shown': 2, 'button': 'Load more (3 left)'},
+        {'shown': 4, 'button': 'Load more (1 left)'},
+        {'shown': 5, 'button': None},
+    ]
+    # Each later item is added as a row when its page is loaded
+    assert result['rows'] == catalog[2:]
+    # Items that were never loaded are submitted as they are
+    assert result['early'] == catalog
+    assert result['submitted'] == catalog
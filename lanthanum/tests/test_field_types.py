@@ -1,6 +1,17 @@
+from decimal import Decimal
+
 import pytest
 
-from ..field_types import DynamicObject, TypedArray, DynamicArray
+from ..field_types import (
+    DynamicArray,
+    DynamicObject,
+    FrozenDynamicArray,
+    TypedArray,
+    freeze_type,
+    get_data,
+    to_bool,
+    to_decimal
+)
 
 
 @pytest.fixture
@@ -47,6 +58,78 @@ class TestDynamicObject:
         assert person_instance.favourite_dog.name == scooby_doo['name']
         assert person_instance.favourite_dog.breed == scooby_doo['breed']
 
+    def test_typed_conversion(self):
+        class RecordType(DynamicObject):
+            price = Decimal
+            in_stock = bool
+            copies = int
+
+        record = RecordType({'price': 9.99, 'in_stock': 'false', 'copies': 3})
+        assert record.price == Decimal('9.99')
+        assert record.in_stock is False
+        assert record.copies == 3
+        # The cached converters aren't taken for sub types
+        assert set(RecordType._get_sub_types()) >= {
+            'price', 'in_stock', 'copies'
+        }
+        assert '_converters' not in RecordType.__dict__
+
+    def test_class_attributes(self):
+        class RecordType(DynamicObject):
+            title = str
+            formats = ['vinyl', 'cd']
+
+        record = RecordType({'title': 'A', 'formats': ['cd']})
+        assert record.title == 'A'
+        assert record.formats == ['vinyl', 'cd']
+        assert freeze_type(RecordType)({'title': 'A'}).title == 'A'
+
+    def test_get_data(self, person_type, shaggy):
+        person = person_type(shaggy)
+        assert get_data(person) is shaggy
+
+        person.favourite_dog.name = 'Scrappy Doo'
+        del person.name
+        data = get_data(person)
+        assert data == {
+            'favourite_dog': dict(shaggy['favourite_dog'], name='Scrappy Doo')
+        }
+        assert 'name' in shaggy
+
+    def test_get_data_numbers(self):
+        class RecordType(DynamicObject):
+            price = Decimal
+
+        record = RecordType({'price': 10})
+        assert get_data(record)['price'] == 10
+        record.price = Decimal('9.99')
+        assert get_data(record) == {'price': 9.99}
+
+
+@pytest.mark.parametrize('value,expected', [
+    (True, True),
+    ('false', False),
+    ('False', False),
+    ('0', False),
+    ('true', True),
+    (0, False),
+    (1, True),
+])
+def test_to_bool(value, expected):
+    assert to_bool(value) is expected
+
+
+@pytest.mark.parametrize('value,expected', [
+    (0.1, Decimal('0.1')),
+    (3.14, Decimal('3.14')),
+    (7, Decimal('7')),
+    ('2.50', Decimal('2.50')),
+])
+def test_to_decimal(value, expected):
+    converted = to_decimal(value)
+    assert converted == expected
+    assert str(converted) == str(expected)
+
 
 class TestTypedArray:
     def test_simple_array(self, dog_array_type, scooby_doo, snoopy):
@@ -80,22 +163,39 @@ class TestTypedArray:
         del dog_array[1]
         assert len(dog_array) == 1
 
+    def test_simple_array_data(self, dog_array_type, scooby_doo, snoopy):
+        data = [scooby_doo, snoopy]
+        dog_array = dog_array_type(data)
+        assert get_data(dog_array) is data
+
+        dog_array.insert(0, snoopy)
+        dog_array[2].breed = 'Poodle'
+        assert get_data(dog_array) == [
+            snoopy, scooby_doo, dict(snoopy, breed='Poodle')
+        ]
+        assert get_data(dog_array)[1] is scooby_doo
+
+
+@pytest.fixture
+def pet_registry(monkeypatch, dog_type, fish_type):
+    class MockDogSchema(object):
+        class Meta:
+            python_type = dog_type
+
+    class MockFishSchema(object):
+        class Meta:
+            python_type = fish_type
+
+    monkeypatch.setattr(
+        'lanthanum.schema_registry.schema_registry',
+        {'dog': MockDogSchema, 'fish': MockFishSchema}
+    )
+
 
 class TestDynamicArray:
     @pytest.fixture(autouse=True)
-    def schema_registry(self, monkeypatch, dog_type, fish_type):
-        class MockDogSchema(object):
-            class Meta:
-                python_type = dog_type
-
-        class MockFishSchema(object):
-            class Meta:
-                python_type = fish_type
-
-        monkeypatch.setattr(
-            'lanthanum.schema_registry.schema_registry',
-            {'dog': MockDogSchema, 'fish': MockFishSchema}
-        )
+    def schema_registry(self, pet_registry):
+        pass
 
     def test_simple_array(self, scooby_doo, nemo):
         pet_array = DynamicArray(
@@ -140,3 +240,70 @@ class TestDynamicArray:
         assert len(pet_array) == 2
         del pet_array[1]
         assert len(pet_array) == 1
+
+
+class TestFrozenTypes:
+    @pytest.fixture(autouse=True)
+    def schema_registry(self, pet_registry):
+        pass
+
+    def test_frozen_object(self, person_type, shaggy, scooby_doo):
+        frozen_type = freeze_type(person_type)
+        assert freeze_type(person_type) is frozen_type
+        assert freeze_type(frozen_type) is frozen_type
+
+        person = frozen_type(shaggy)
+        assert isinstance(person, person_type)
+        assert person.favourite_dog.name == scooby_doo['name']
+        assert person == frozen_type(dict(shaggy))
+        assert hash(person) == hash(frozen_type(dict(shaggy)))
+        assert person != person_type(shaggy)
+        with pytest.raises(AttributeError):
+            person.name = 'Fred'
+        with pytest.raises(AttributeError):
+            person.favourite_dog.name = 'Snoopy'
+
+        thawed = person.thaw()
+        thawed.name = 'Fred'
+        assert type(thawed) is person_type
+        assert person.name == shaggy['name']
+
+    def test_frozen_typed_array(self, dog_array_type, scooby_doo, snoopy):
+        frozen_type = freeze_type(dog_array_type)
+        dogs = frozen_type([scooby_doo, snoopy])
+
+        assert len(dogs) == 2
+        assert isinstance(dogs._items, tuple)
+        assert dogs[1].name == snoopy['name']
+        assert hash(dogs) == hash(frozen_type([scooby_doo, snoopy]))
+        assert not hasattr(dogs, 'insert')
+        with pytest.raises(TypeError):
+            dogs[0] = snoopy
+        with pytest.raises(AttributeError):
+            dogs[0].name = 'Snoopy'
+
+        thawed = dogs.thaw()
+        thawed.append(snoopy)
+        assert type(thawed) is dog_array_type
+        assert len(thawed) == 3
+        assert len(dogs) == 2
+
+    def test_frozen_dynamic_array(self, scooby_doo, nemo):
+        assert freeze_type(DynamicArray) is FrozenDynamicArray
+        data = [
+            {'schemaName': 'dog', 'data': scooby_doo},
+            {'schemaName': 'fish', 'data': nemo}
+        ]
+        pets = FrozenDynamicArray(data)
+
+        assert [pet.name for pet in pets] == ['Scooby Doo', 'Nemo']
+        assert pets == FrozenDynamicArray(data)
+        assert len({pets, FrozenDynamicArray(data)}) == 1
+        with pytest.raises(AttributeError):
+            pets[1].salt_water = False
+        assert str(pets) == str(list(pets))
+
+        thawed = pets.thaw()
+        del thawed[0]
+        assert isinstance(thawed, DynamicArray)
+        assert len(pets) == 2
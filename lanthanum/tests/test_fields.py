@@ -1,8 +1,14 @@
 import json
 
 from django.core.serializers import serialize
+from django.forms import modelform_factory, modelformset_factory
 import pytest
 
+from ..fields import DynamicField
+from ..schema_registry import schema_registry
+from ..utils import content_hash
+from ..validation import get_validator, schema_error
+from ..widgets import get_schema_payload_hash
 from .mock_app.models import RecordShop
 
 
@@ -71,6 +77,84 @@ class TestFields:
         record_shop.refresh_from_db()
         assert record_shop.catalog is None
 
+    def test_item_ids_assigned_on_save(self, monkeypatch, record_catalog):
+        """
+        Items get a stable ID when first saved, which is kept afterwards
+        """
+        field = RecordShop._meta.get_field('catalog')
+        monkeypatch.setattr(field.schema_field, '_item_ids', True)
+
+        record_shop = RecordShop.objects.create(
+            name="HMV", catalog=record_catalog
+        )
+        item_ids = [item['id'] for item in record_shop.catalog]
+        assert all(item_ids)
+        # The data passed in is left as it was
+        assert not any('id' in item for item in record_catalog)
+
+        hydrated = RecordShop._meta.get_field('catalog').output_type(
+            record_catalog
+        )
+        other_shop = RecordShop.objects.create(name="Virgin", catalog=hydrated)
+        assert all(other_shop.catalog._ids)
+        assert hydrated._data is record_catalog
+        assert not any(hydrated._ids)
+
+        record_shop.refresh_from_db()
+        record_shop.catalog = record_shop.catalog._data
+        record_shop.save()
+        record_shop.refresh_from_db()
+        assert record_shop.catalog.get_by_id(item_ids[1]).title == (
+            record_catalog[1]['data']['title']
+        )
+        assert record_shop.catalog._ids == item_ids
+
+    def test_save_changed_document(self, hmv_instance, record_catalog):
+        """
+        Changes made to a loaded document are saved
+        """
+        catalog = hmv_instance.catalog
+        catalog.append({'schemaName': 'album', 'data': {'title': 'B'}})
+        del catalog[0]
+        catalog[0].title = 'A'
+        hmv_instance.save()
+        # Unchanged items are saved as they were loaded
+        assert hmv_instance.catalog._dump()[1] is catalog._wrappers[1]
+
+        hmv_instance.refresh_from_db()
+        assert [item.title for item in hmv_instance.catalog] == ['A', 'B']
+        assert hmv_instance.catalog._data == [
+            {'schemaName': 'album', 'data': {'title': 'A'}},
+            {'schemaName': 'album', 'data': {'title': 'B'}}
+        ]
+
+        # An unchanged document is saved as the data it was loaded from
+        assert hmv_instance.catalog._dump() is hmv_instance.catalog._data
+
+    def test_deconstruct(self):
+        field = RecordShop._meta.get_field('catalog')
+        name, path, args, kwargs = field.deconstruct()
+        assert kwargs == {
+            'schema_field': field.schema_field, 'blank': True, 'null': True
+        }
+
+        field = DynamicField(
+            schema_field=field.schema_field, frozen=True, editor_page_size=50,
+            editor_patch=True
+        )
+        name, path, args, kwargs = field.deconstruct()
+        assert kwargs == {
+            'schema_field': field.schema_field,
+            'frozen': True,
+            'editor_page_size': 50,
+            'editor_patch': True
+        }
+        clone = field.clone()
+        assert clone.frozen
+        assert clone.output_type is field.output_type
+        assert clone.editor_page_size == 50
+        assert clone.editor_patch
+
     def test_serialize_dynamic_field(self, hmv_instance, record_catalog):
         """
         Serialize the dynamic field to json
@@ -130,6 +214,316 @@ class TestFields:
         assert item_2.title == alternative_record_catalog[1]['data']['title']
         assert item_2.artist == alternative_record_catalog[1]['data']['artist']
 
+    def test_form_parses_once(
+        self, hmv_instance, alternative_record_catalog,
+        record_shop_form_class, monkeypatch
+    ):
+        """
+        Posted JSON is parsed and hydrated once and saved as it is
+        """
+        loads = []
+        json_loads = json.loads
+
+        def counting_loads(*args, **kwargs):
+            loads.append(args[0])
+            return json_loads(*args, **kwargs)
+        monkeypatch.setattr(json, 'loads', counting_loads)
+
+        record_shop_form = record_shop_form_class(
+            {
+                'name': 'HMV',
+                'catalog': json.dumps(alternative_record_catalog)
+            },
+            instance=hmv_instance
+        )
+        assert record_shop_form.is_valid()
+        catalog = record_shop_form.cleaned_data['catalog']
+        assert catalog[1].artist == 'Top Cat'
+
+        record_shop_form.save()
+        assert record_shop_form.changed_data == ['catalog']
+        assert hmv_instance.catalog is catalog
+        assert len(loads) == 1
+
+        hmv_instance.refresh_from_db()
+        assert hmv_instance.catalog._data == alternative_record_catalog
+
+    def test_form_field_errors_by_pointer(self, record_shop_form_class):
+        record_shop_form = record_shop_form_class({
+            'name': 'virgin',
+            'catalog': json.dumps([
+                {'schemaName': 'single', 'data': {'title': 'A'}},
+                {'schemaName': 'single', 'data': {'artist': 'B'}}
+            ])
+        })
+
+        assert not record_shop_form.is_valid()
+        assert record_shop_form.errors['catalog'] == [
+            "/1/data: 'title' is a required property"
+        ]
+        assert 'root.1.data' in str(record_shop_form['catalog'])
+        widget = record_shop_form.fields['catalog'].widget
+        assert widget.errors == {
+            '/1/data': ["'title' is a required property"]
+        }
+        assert widget.get_editor_errors() == [{
+            'path': 'root.1.data',
+            'property': 'server',
+            'message': "'title' is a required property"
+        }]
+
+    def test_render_escapes_script(self, record_shop_form_class):
+        catalog = json.dumps([{
+            'schemaName': 'single',
+            'data': {'title': '</script><script>alert(1)</script>'}
+        }])
+        record_shop_form = record_shop_form_class({
+            'name': 'virgin', 'catalog': catalog
+        })
+        assert record_shop_form.is_valid()
+        record_shop_form.add_error('catalog', schema_error([
+            ('/0/data', '</script><script>alert(2)</script>')
+        ]))
+
+        html = str(record_shop_form['catalog'])
+        assert '<script>alert' not in html
+        assert '\\u003C/script\\u003E\\u003Cscript\\u003Ealert(1)' in html
+        assert '\\u003C/script\\u003E\\u003Cscript\\u003Ealert(2)' in html
+
+    def test_form_validates_changes(
+        self, hmv_instance, record_catalog, record_shop_form_class,
+        monkeypatch
+    ):
+        """
+        Only the items a form changes are checked against their schema
+        """
+        checked = []
+        validator = get_validator(RecordShop._meta.get_field(
+            'catalog'
+        ).schema_field)
+        iter_item_errors = validator.iter_item_errors
+
+        def record_item_errors(item, path, previous=None):
+            checked.append(path)
+            return iter_item_errors(item, path, previous)
+        monkeypatch.setattr(validator, 'iter_item_errors', record_item_errors)
+
+        # The stored catalog is only trusted once it's known to be valid
+        hmv_instance.full_clean()
+        assert checked == ['/0', '/1']
+        del checked[:]
+
+        new_single = {'schemaName': 'single', 'data': {'title': 'New'}}
+        record_shop_form = record_shop_form_class(
+            {
+                'name': 'HMV',
+                'catalog': [new_single, record_catalog[1], record_catalog[0]]
+            },
+            instance=hmv_instance
+        )
+        assert record_shop_form.is_valid()
+        assert checked == ['/0']
+        assert '_catalog_previous' not in vars(hmv_instance)
+
+    def test_form_applies_patch(
+        self, hmv_instance, record_catalog, record_shop_form_class
+    ):
+        record_shop_form = record_shop_form_class(
+            {
+                'name': 'HMV',
+                'catalog': '',
+                'catalog_patch': json.dumps([
+                    {'op': 'replace', 'path': '/0/data/title', 'value': 'Yo'},
+                    {'op': 'remove', 'path': '/1'}
+                ]),
+                'catalog_base': content_hash(record_catalog)
+            },
+            instance=hmv_instance
+        )
+        assert record_shop_form.is_valid()
+        assert record_shop_form.changed_data == ['catalog']
+        record_shop_form.save()
+
+        hmv_instance.refresh_from_db()
+        assert len(hmv_instance.catalog) == 1
+        assert hmv_instance.catalog[0].title == 'Yo'
+        assert hmv_instance.catalog[0].artist == 'Scooby Doo'
+
+    @pytest.mark.parametrize('patch,error', [
+        ('{"op": "add"}', "The changes could not be read"),
+        ('[{"op": "add"}]', "The changes could not be read"),
+        ('[{"op": "add", "path": "/0"}]', "The changes could not be read"),
+        ('[{"op": "move", "path": "/0"}]', "The changes could not be read"),
+        ('[{"path": "/0"}]', "The changes could not be read"),
+        ('[{"op": "remove", "path": 5}]', "The changes could not be read"),
+        (
+            '[{"op": "copy", "from": 0, "path": "/0"}]',
+            "The changes could not be read"
+        ),
+        ('[{"op": ["add"], "path": "/0"}]', "The changes could not be read"),
+        (
+            '[{"op": "remove", "path": "/5"}]',
+            "The changes could not be applied: 5 is out of range"
+        ),
+        (
+            '[{"op": "remove", "path": "/0/data/title"}]',
+            "/0/data: 'title' is a required property"
+        ),
+    ])
+    def test_form_patch_errors(
+        self, hmv_instance, record_catalog, record_shop_form_class, patch,
+        error
+    ):
+        record_shop_form = record_shop_form_class(
+            {
+                'name': 'HMV',
+                'catalog_patch': patch,
+                'catalog_base': content_hash(record_catalog)
+            },
+            instance=hmv_instance
+        )
+        assert not record_shop_form.is_valid()
+        assert record_shop_form.errors['catalog'] == [error]
+
+    @pytest.mark.parametrize('base', [None, 'stale'])
+    def test_form_refuses_stale_patch(
+        self, hmv_instance, record_shop_form_class, base
+    ):
+        data = {
+            'name': 'HMV',
+            'catalog_patch': json.dumps([
+                {'op': 'replace', 'path': '/0/data/title', 'value': 'Yo'}
+            ])
+        }
+        if base is not None:
+            data['catalog_base'] = base
+        record_shop_form = record_shop_form_class(data, instance=hmv_instance)
+        assert not record_shop_form.is_valid()
+        assert record_shop_form.errors.as_data()['catalog'][0].code == (
+            'stale_patch'
+        )
+
+    def test_render_patch_from_stored_value(
+        self, hmv_instance, record_catalog, record_shop_form_class,
+        monkeypatch
+    ):
+        """
+        A form shown again with patched data still patches the stored value
+        """
+        field = RecordShop._meta.get_field('catalog')
+        monkeypatch.setattr(field, 'editor_patch', True)
+        form_class = modelform_factory(
+            RecordShop, form=record_shop_form_class, fields=['catalog']
+        )
+        stored = json.dumps(hmv_instance.catalog._data)
+        record_shop_form = form_class(
+            {
+                'catalog_patch': json.dumps([
+                    {'op': 'remove', 'path': '/0/data/title'}
+                ]),
+                'catalog_base': content_hash(record_catalog)
+            },
+            instance=hmv_instance
+        )
+        assert not record_shop_form.is_valid()
+
+        html = str(record_shop_form['catalog'])
+        assert 'var catalog_original = {};'.format(stored) in html
+        assert 'name="catalog_base" value="{}"'.format(
+            content_hash(record_catalog)
+        ) in html
+
+    def test_render_patch_widget(self, monkeypatch):
+        field = RecordShop._meta.get_field('catalog')
+        monkeypatch.setattr(field, 'editor_patch', True)
+
+        html = field.formfield().widget.render(name="catalog", value='[]')
+        assert 'name="catalog_patch"' in html
+        assert "lanthanumDiff(catalog_original" in html
+
+    def test_render_paged_widget(self, monkeypatch):
+        field = RecordShop._meta.get_field('catalog')
+        monkeypatch.setattr(field, 'editor_page_size', 20)
+
+        widget = field.formfield().widget
+        html = widget.render(name="catalog", value='[]')
+        assert "var catalog_page_size = 20;" in html
+        assert '"collapsed": 1' in html
+        # The field's schema is left unchanged
+        assert 'options' not in field.schema_field.editor_schema['items']
+
+    def test_render_shared_schema(self, record_shop_form_class, settings):
+        settings.ROOT_URLCONF = 'lanthanum.tests.urls'
+        formset = modelformset_factory(
+            RecordShop, form=record_shop_form_class, extra=3
+        )(queryset=RecordShop.objects.none())
+
+        scripts = [
+            script for script in formset.media._js
+            if script.startswith('/lanthanum/schemas/')
+        ]
+        assert len(scripts) == 1
+        assert scripts[0].startswith(
+            '/lanthanum/schemas/one_of_single_or_album.js?collapsed=0&paged=0'
+        )
+        html = ''.join(str(form['catalog']) for form in formset)
+        assert html.count(
+            'JSON.parse(lanthanumSchemas["one_of_single_or_album:0:0"])'
+        ) == 3
+        assert '"oneOf"' not in html
+        # Formset field names aren't JavaScript identifiers
+        assert 'var form_1_catalog_editor = new JSONEditor' in html
+        assert 'document.getElementById("form-1-catalog_editor")' in html
+        assert 'form-1-catalog_' not in html.replace('"form-1-catalog_', '')
+
+    def test_editor_schema_view(
+        self, admin_client, client, settings, monkeypatch
+    ):
+        settings.ROOT_URLCONF = 'lanthanum.tests.urls'
+        get = admin_client.get
+        response = get(
+            '/lanthanum/schemas/one_of_single_or_album.js?collapsed=0&paged=1'
+        )
+        assert response['Content-Type'] == 'application/javascript'
+        script = response.content.decode('utf-8')
+        key, schema_json = script.splitlines()[1][:-1].split(' = ')
+        assert key == 'lanthanumSchemas["one_of_single_or_album:0:1"]'
+        schema = json.loads(json.loads(schema_json))
+        assert schema['options'] == {'collapsed': 0}
+        assert schema['items']['options'] == {'collapsed': 1}
+        assert response['Cache-Control'] == 'no-cache'
+
+        version = get_schema_payload_hash('one_of_single_or_album', 0, 1)
+        response = get(
+            '/lanthanum/schemas/one_of_single_or_album.js'
+            '?collapsed=0&paged=1&v={}'.format(version)
+        )
+        assert 'max-age=31536000' in response['Cache-Control']
+        assert 'private' in response['Cache-Control']
+        assert response.content.decode('utf-8') == script
+
+        # A field registered again under the name is served instead
+        monkeypatch.setitem(
+            schema_registry, 'one_of_single_or_album', schema_registry['album']
+        )
+        assert get_schema_payload_hash(
+            'one_of_single_or_album', 0, 1
+        ) != version
+        response = get(
+            '/lanthanum/schemas/one_of_single_or_album.js'
+            '?collapsed=0&paged=1&v={}'.format(version)
+        )
+        assert response['Cache-Control'] == 'no-cache'
+        assert response.content.decode('utf-8') != script
+
+        response = get('/lanthanum/schemas/missing.js')
+        assert response.status_code == 404
+
+        # Schemas are only served to staff
+        response = client.get('/lanthanum/schemas/album.js')
+        assert response.status_code == 302
+        assert response['Location'].startswith('/admin/login/')
+
     def test_render_empty_form_field_widget(self, record_shop_form_class):
         record_shop_form = record_shop_form_class()
 
@@ -0,0 +1,43 @@
+import pytest
+
+from ..instrumentation import TimingCollector, timed_call
+from .mock_app.models import RecordShop
+
+
+def test_timed_call_without_receivers():
+    assert timed_call(None, 'event', 'name', sum, [1, 2], measure=len) == 3
+
+
+def test_timed_call_with_collector():
+    with TimingCollector() as collector:
+        timed_call(None, 'event', 'name', sum, [1, 2], size=2)
+        timed_call(None, 'event', 'name', sum, [3], size=1)
+    timed_call(None, 'event', 'name', sum, [4], size=1)
+
+    stats = collector.stats[('event', 'name')]
+    assert stats.count == 2
+    assert stats.size == 3
+    assert stats.duration >= 0
+
+
+@pytest.mark.django_db
+def test_field_events(record_shop_form_class):
+    RecordShop.objects.create(
+        name='HMV',
+        catalog=[{'schemaName': 'album', 'data': {'title': 'Dogs'}}]
+    )
+    catalog_field = RecordShop._meta.get_field('catalog')
+    schema_name = catalog_field.schema_field.Meta.schema_name
+
+    with TimingCollector() as collector:
+        catalog_field.formfield()
+        record_shop = RecordShop.objects.get(name='HMV')
+        form = record_shop_form_class(
+            {'name': 'HMV', 'catalog': '[]'}, instance=record_shop
+        )
+        form.is_valid()
+        form['catalog'].as_widget()
+
+    for event in ['hydrate', 'schema', 'validate', 'render']:
+        assert collector.stats[(event, schema_name)].count == 1
+    assert collector.stats[('hydrate', schema_name)].size == 1
@@ -0,0 +1,102 @@
+import pytest
+
+from ..field_types import FrozenDynamicArray, freeze_type
+from ..fields import DynamicField
+from ..interning import InternTable
+from .mock_app.models import RecordShop
+
+
+@pytest.fixture
+def owners(person_field, shaggy):
+    person_type = freeze_type(person_field().Meta.python_type)
+    return person_type(shaggy), person_type(dict(shaggy))
+
+
+def test_content_hash_equality(owners, dog_field, snoopy):
+    shaggy, shaggy_copy = owners
+    assert shaggy is not shaggy_copy
+    assert shaggy == shaggy_copy
+    assert hash(shaggy) == hash(shaggy_copy)
+    assert shaggy.favourite_dog == shaggy_copy.favourite_dog
+    assert shaggy.favourite_dog != (
+        freeze_type(dog_field().Meta.python_type)(snoopy)
+    )
+
+
+def test_mutable_objects_compare_by_identity(person_field, shaggy):
+    person_type = person_field().Meta.python_type
+    person = person_type(shaggy)
+    copy = person_type(dict(shaggy))
+    assert person == person
+    assert person != copy
+    assert hash(person) != hash(copy)
+
+    copy.name = 'Fred'
+    assert copy in {copy}
+
+
+def test_intern_objects(owners):
+    table = InternTable()
+    shaggy, shaggy_copy = owners
+    first = table.intern(shaggy)
+    second = table.intern(shaggy_copy)
+
+    assert first is shaggy
+    assert second is shaggy
+    assert len(table) == 2
+
+
+def test_intern_nested_objects(person_field, shaggy, scooby_doo):
+    table = InternTable()
+    person_type = freeze_type(person_field().Meta.python_type)
+    fred = person_type({'name': 'Fred', 'favourite_dog': scooby_doo})
+
+    shaggy = table.intern(person_type(shaggy))
+    fred = table.intern(fred)
+    assert fred.favourite_dog is shaggy.favourite_dog
+
+
+def test_intern_mutable_objects(person_field, shaggy):
+    with pytest.raises(TypeError):
+        InternTable().intern(person_field().Meta.python_type(shaggy))
+
+
+@pytest.mark.django_db
+def test_field_intern_table(monkeypatch):
+    table = InternTable()
+    field = RecordShop._meta.get_field('catalog')
+    monkeypatch.setattr(field, 'intern_table', table)
+    monkeypatch.setattr(field, 'output_type', freeze_type(field.output_type))
+
+    album = {'schemaName': 'album', 'data': {'title': 'Dogs'}}
+    single = {'schemaName': 'single', 'data': {'title': 'Cats'}}
+    RecordShop.objects.create(name='HMV', catalog=[album, single])
+    RecordShop.objects.create(name='Virgin', catalog=[single, album])
+
+    hmv, virgin = RecordShop.objects.order_by('name')
+    assert hmv.catalog[0] is virgin.catalog[1]
+    assert hmv.catalog[1] is virgin.catalog[0]
+
+
+def test_interned_field_is_frozen():
+    schema_field = RecordShop._meta.get_field('catalog').schema_field
+    field = DynamicField(schema_field=schema_field, intern_table=InternTable())
+    assert field.output_type is freeze_type(schema_field.Meta.python_type)
+
+
+@pytest.mark.django_db
+def test_field_intern_frozen(monkeypatch):
+    table = InternTable()
+    field = RecordShop._meta.get_field('catalog')
+    monkeypatch.setattr(field, 'intern_table', table)
+    monkeypatch.setattr(field, 'output_type', freeze_type(field.output_type))
+
+    album = {'schemaName': 'album', 'data': {'title': 'Dogs'}}
+    RecordShop.objects.create(name='HMV', catalog=[album])
+    RecordShop.objects.create(name='Virgin', catalog=[album])
+
+    hmv, virgin = RecordShop.objects.order_by('name')
+    assert isinstance(hmv.catalog, FrozenDynamicArray)
+    assert hmv.catalog[0] is virgin.catalog[0]
+    with pytest.raises(AttributeError):
+        hmv.catalog[0].title = 'Cats'
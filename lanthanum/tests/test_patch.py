@@ -0,0 +1,133 @@
+import pytest
+
+from ..patch import apply_patch, diff
+from .mock_app.schema_fields import music_catalog_field
+
+
+def single(title, artist='Blur'):
+    return {'schemaName': 'single', 'data': {'title': title, 'artist': artist}}
+
+
+def album(title):
+    return {'schemaName': 'album', 'data': {'title': title}}
+
+
+@pytest.fixture
+def catalog():
+    return [single('Song 2'), album('Parklife'), single('Beetlebum')]
+
+
+@pytest.mark.parametrize('edit,expected', [
+    (
+        lambda items: items[:1] + [single('Girls & Boys')] + items[1:],
+        [{'op': 'add', 'path': '/1', 'value': single('Girls & Boys')}]
+    ),
+    (
+        lambda items: items[:1] + items[2:],
+        [{'op': 'remove', 'path': '/1'}]
+    ),
+    (
+        lambda items: items[:2] + [single('Beetlebum', artist='Oasis')],
+        [{'op': 'replace', 'path': '/2/data/artist', 'value': 'Oasis'}]
+    ),
+    (
+        lambda items: [album('Song 2')] + items[1:],
+        [{'op': 'replace', 'path': '/0', 'value': album('Song 2')}]
+    ),
+])
+def test_diff_catalog(catalog, edit, expected):
+    edited = edit(catalog)
+    patch = diff(catalog, edited, music_catalog_field)
+    assert patch == expected
+    assert apply_patch(catalog, patch) == edited
+
+
+def test_diff_round_trip(catalog):
+    edited = [album('Leisure'), single('Song 2', artist='Gorillaz')]
+    edited[1]['data'].pop('artist')
+    patch = diff(catalog, edited, music_catalog_field)
+    assert apply_patch(catalog, patch) == edited
+    assert diff(catalog, catalog, music_catalog_field) == []
+
+
+def test_diff_type_changes():
+    assert diff({'a': [1, 2]}, {'a': [True, 2.0]}, None) == [
+        {'op': 'replace', 'path': '/a/0', 'value': True},
+        {'op': 'replace', 'path': '/a/1', 'value': 2.0}
+    ]
+    old = [{'schemaName': 'single', 'data': {'title': 'A', 'n': 1}}]
+    new = [{'schemaName': 'single', 'data': {'title': 'A', 'n': True}}]
+    assert diff(old, new, music_catalog_field) == [
+        {'op': 'replace', 'path': '/0/data/n', 'value': True}
+    ]
+
+
+def test_apply_patch_copies_on_write(catalog):
+    patch = [
+        {'op': 'replace', 'path': '/0/data/title', 'value': 'Tender'},
+        {'op': 'move', 'from': '/2', 'path': '/0'},
+        {'op': 'test', 'path': '/1/data/title', 'value': 'Tender'},
+    ]
+    patched = apply_patch(catalog, patch)
+
+    assert catalog[0]['data']['title'] == 'Song 2'
+    assert [item['data']['title'] for item in patched] == [
+        'Beetlebum', 'Tender', 'Parklife'
+    ]
+    assert patched[2] is catalog[1]
+
+
+@pytest.mark.parametrize('operation', [
+    {'op': 'remove', 'path': '/5'},
+    {'op': 'replace', 'path': '/0/data/label', 'value': 'EMI'},
+    {'op': 'test', 'path': '/0/schemaName', 'value': 'album'},
+    {'op': 'add', 'path': 'data', 'value': 1},
+    {'op': 'swap', 'path': '/0'},
+    {'op': 'add'},
+    {'op': 'add', 'path': '/0'},
+    {'op': 'move', 'path': '/0'},
+    {'path': '/0'},
+    {'op': 'remove', 'path': 5},
+    {'op': {}, 'path': '/0'},
+    'remove',
+])
+def test_apply_invalid_patch(catalog, operation):
+    with pytest.raises(ValueError):
+        apply_patch(catalog, [operation])
+
+
+def test_diff_moves_identified_items(catalog):
+    for i, item in enumerate(catalog):
+        item['id'] = str(i)
+    edited = [catalog[2], catalog[0], dict(catalog[1], data={'title': 'Up'})]
+    edited.append(dict(album('Blur'), id='3'))
+
+    patch = diff(catalog, edited, music_catalog_field)
+    assert patch == [
+        {'op': 'move', 'from': '/2', 'path': '/0'},
+        {'op': 'replace', 'path': '/2/data/title', 'value': 'Up'},
+        {'op': 'add', 'path': '/3', 'value': edited[3]},
+    ]
+    assert apply_patch(catalog, patch) == edited
+
+    removed = diff(catalog, [catalog[1], catalog[0]], music_catalog_field)
+    assert removed == [
+        {'op': 'remove', 'path': '/2'},
+        {'op': 'move', 'from': '/1', 'path': '/0'},
+    ]
+
+
+def test_diff_moves_fewest_items():
+    catalog = [dict(album(str(i)), id=str(i)) for i in range(1000)]
+    edited = catalog[1:] + catalog[:1]
+    assert diff(catalog, edited, music_catalog_field) == [
+        {'op': 'move', 'from': '/0', 'path': '/999'}
+    ]
+
+    shuffled = catalog[500:] + catalog[:500]
+    shuffled = shuffled[::2] + shuffled[1::2]
+    shuffled[10] = dict(shuffled[10], data={'title': 'Changed'})
+    shuffled.insert(3, dict(album('New'), id='new'))
+    del shuffled[600]
+    patch = diff(catalog, shuffled, music_catalog_field)
+    assert apply_patch(catalog, patch) == shuffled
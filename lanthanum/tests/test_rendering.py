@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.template import Context, Template
+import pytest
+
+from ..rendering import BlockRenderer
+from .mock_app.schema_fields import music_catalog_field
+
+
+@pytest.fixture
+def catalog():
+    return music_catalog_field.Meta.python_type([
+        {'schemaName': 'single', 'data': {'title': 'A', 'artist': 'Odie'}},
+        {'schemaName': 'album', 'data': {'title': 'B'}},
+        {'schemaName': 'single', 'data': {'title': 'A', 'artist': 'Odie'}}
+    ])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+class TestBlockRenderer:
+    def test_render(self, catalog):
+        html = BlockRenderer().render(catalog)
+        assert html == (
+            '<h2>A</h2><p>Odie</p>\n'
+            '<h2>B</h2>\n'
+            '<h2>A</h2><p>Odie</p>\n'
+        )
+
+    def test_blocks_are_cached(self, monkeypatch, catalog):
+        renderer = BlockRenderer()
+        renderer.render(catalog)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("Block rendered again")
+
+        monkeypatch.setattr(renderer, 'render_block', fail)
+        assert renderer.render(catalog).startswith('<h2>A</h2>')
+
+    def test_identical_blocks_render_once(self, monkeypatch, catalog):
+        renderer = BlockRenderer()
+        calls = []
+        render_block = renderer.render_block
+
+        def counting_render_block(block, context=None):
+            calls.append(block.schema_name)
+            return render_block(block, context)
+
+        monkeypatch.setattr(renderer, 'render_block', counting_render_block)
+        renderer.render(catalog)
+        assert calls == ['single', 'album']
+
+    def test_cache_key_includes_context(self, catalog):
+        renderer = BlockRenderer()
+        other_renderer = BlockRenderer(template_dir='other/blocks')
+        block = catalog[0]
+
+        keys = {
+            renderer.get_cache_key(block),
+            renderer.get_cache_key(
+                block, renderer.get_context_hash({'lang': 'fr'})
+            ),
+            other_renderer.get_cache_key(block)
+        }
+        assert len(keys) == 3
+
+    def test_context_must_be_serializable(self, catalog):
+        with pytest.raises(TypeError):
+            BlockRenderer().render(catalog, {'renderer': object()})
+
+
+def test_render_blocks_tag(catalog):
+    template = Template(
+        "{% load lanthanum_blocks %}{% render_blocks blocks %}"
+    )
+    html = template.render(Context({'blocks': catalog}))
+    assert '<h2>B</h2>' in html
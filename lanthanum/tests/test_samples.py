@@ -0,0 +1,134 @@
+from django.core.management import call_command, CommandError
+import pytest
+
+from ..samples import SampleGenerator, generate_documents
+from ..schema_fields import (
+    ArrayField,
+    BooleanField,
+    CharField,
+    DecimalField,
+    DynamicArrayField,
+    IntegerField,
+    ObjectField,
+    TextField
+)
+from ..validation import get_validator
+from .mock_app.models import RecordShop
+from .mock_app.schema_fields import music_catalog_field
+
+
+class SampleTrackField(ObjectField):
+    title = CharField(required=True, min_length=3, max_length=12)
+    genre = CharField(choices=[('pop', 'Pop'), ('rock', 'Rock')])
+    notes = TextField()
+    explicit = BooleanField(required=True)
+    seconds = IntegerField()
+    price = DecimalField()
+    tags = ArrayField(base_field=CharField(required=True))
+
+
+class SampleReleaseField(ObjectField):
+    name = CharField(required=True)
+    tracks = DynamicArrayField(
+        allowed_fields=[SampleTrackField()],
+        required=True,
+        min_items=1,
+        max_items=3,
+        item_ids=True
+    )
+
+
+sample_releases_field = DynamicArrayField(
+    allowed_fields=[SampleReleaseField(), SampleTrackField()],
+    max_items=50
+)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_documents_are_valid(seed):
+    documents = generate_documents(sample_releases_field, 10, seed=seed)
+    validator = get_validator(sample_releases_field)
+    assert all(validator.is_valid(document) for document in documents)
+
+
+def test_field_options():
+    generator = SampleGenerator(size=20, optional=1, seed=1)
+    releases = generator.generate(sample_releases_field)
+    assert len(releases) == 20
+
+    tracks = [item['data'] for item in releases if item['schemaName'] == (
+        'sample_track'
+    )]
+    assert tracks
+    for track in tracks:
+        assert 3 <= len(track['title']) <= 12
+        assert track['genre'] in ('pop', 'rock')
+        assert set(track) == {
+            'title', 'genre', 'notes', 'explicit', 'seconds', 'price', 'tags'
+        }
+    for item in releases:
+        if item['schemaName'] == 'sample_release':
+            assert 1 <= len(item['data']['tracks']) <= 3
+            assert all(track['id'] for track in item['data']['tracks'])
+
+
+def test_size_and_depth():
+    releases = SampleGenerator(size=200, depth=1, seed=2).generate(
+        sample_releases_field
+    )
+    assert len(releases) == 50
+    for item in releases:
+        if item['schemaName'] == 'sample_release':
+            # Nesting stops at the depth, keeping the minimum items
+            assert len(item['data']['tracks']) == 1
+            assert set(item['data']['tracks'][0]['data']) == {
+                'title', 'explicit'
+            }
+
+
+def test_unique_items():
+    class CoinField(ObjectField):
+        heads = BooleanField(required=True)
+
+    coins_field = DynamicArrayField(
+        schema_name='sample_coins',
+        allowed_fields=[CoinField()],
+        unique_items=True
+    )
+    coins = SampleGenerator(size=5, seed=5).generate(coins_field)
+    assert len(coins) == 2
+    assert get_validator(coins_field).is_valid(coins)
+
+    three_coins_field = DynamicArrayField(
+        schema_name='sample_three_coins',
+        allowed_fields=[CoinField()],
+        unique_items=True,
+        min_items=3
+    )
+    with pytest.raises(ValueError):
+        SampleGenerator(size=5, seed=5).generate(three_coins_field)
+
+
+def test_seeded_documents_repeat():
+    assert generate_documents(music_catalog_field, 3, seed=3) == (
+        generate_documents(music_catalog_field, 3, seed=3)
+    )
+
+
+@pytest.mark.django_db
+def test_generate_samples_command():
+    call_command(
+        'generate_samples', 'mock_app.RecordShop', 'catalog',
+        count=7, size=4, batch_size=3, seed=4, set=['name=Shop {n}']
+    )
+
+    shops = RecordShop.objects.order_by('id')
+    assert [shop.name for shop in shops] == [
+        'Shop {}'.format(n) for n in range(7)
+    ]
+    assert all(len(shop.catalog) == 4 for shop in shops)
+
+    with pytest.raises(CommandError):
+        call_command('generate_samples', 'mock_app.RecordShop', 'name')
+    with pytest.raises(CommandError):
+        call_command('generate_samples', 'mock_app.RecordShop', 'missing')
@@ -1,5 +1,7 @@
 from decimal import Decimal
 
+import pytest
+
 from ..schema_fields import (
     ArrayField,
     BooleanField,
@@ -498,3 +500,31 @@ class TestDynamicArrayField:
         assert scooby_doo_instance.breed == scooby_doo['breed']
         assert nemo_instance.name == nemo['name']
         assert nemo_instance.salt_water == nemo['salt_water']
+
+    def test_item_ids(self, dog_field, fish_field, scooby_doo, nemo):
+        pet_field = DynamicArrayField(
+            schema_name="identified_pets",
+            allowed_fields=[dog_field(), fish_field()],
+            item_ids=True
+        )
+        for item_schema in pet_field.editor_schema['items']['oneOf']:
+            assert item_schema['properties']['id'] == {
+                'title': 'ID',
+                'type': 'string',
+                'options': {'hidden': True}
+            }
+            assert 'id' in item_schema['defaultProperties']
+            assert 'id' not in item_schema['required']
+        assert 'id' not in dog_field().typed_schema['properties']
+
+        pet_list = pet_field.Meta.python_type([
+            {"schemaName": "dog", "data": scooby_doo, "id": "a"},
+            {"schemaName": "fish", "data": nemo, "id": "b"}
+        ])
+        assert pet_list.get_by_id("b").name == nemo['name']
+        pet_list.insert(0, {"schemaName": "fish", "data": nemo, "id": "c"})
+        assert pet_list.index_of_id("b") == 2
+        del pet_list[0]
+        assert pet_list.index_of_id("a") == 0
+        with pytest.raises(KeyError):
+            pet_list.get_by_id("c")
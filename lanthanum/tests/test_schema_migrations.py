@@ -0,0 +1,150 @@
+from django.apps import apps
+from django.db import connection
+from django.db.migrations.state import ProjectState
+import pytest
+
+from ..operations import UpgradeSchemaVersion
+from ..schema_migrations import migrate_schema
+from ..transforms import (
+    AddField,
+    RemoveField,
+    RenameField,
+    clear_upgrade_chains,
+    get_upgrade_chain,
+    get_upgrade_counts,
+    reset_upgrade_counts,
+    upgrade_item
+)
+from ..schema_registry import schema_registry
+from .mock_app.models import RecordShop
+
+
+@pytest.fixture
+def versioned_single(monkeypatch):
+    """
+    Version 1 singles had a name, version 2 renamed it to the title and
+    version 3 added a label and dropped the price.
+    """
+    meta = schema_registry['single'].Meta
+    monkeypatch.setattr(meta, 'schema_version', 3)
+    monkeypatch.setattr(meta, 'upgrades', {
+        1: [RenameField('name', 'title')],
+        2: [AddField('label', default='Unknown'), RemoveField('price')]
+    })
+    clear_upgrade_chains()
+    reset_upgrade_counts()
+    yield
+    clear_upgrade_chains()
+
+
+@pytest.fixture
+def old_catalog():
+    return [
+        {
+            'schemaName': 'single',
+            'data': {'name': 'Scooby Snacks', 'price': 3}
+        },
+        {
+            'schemaName': 'album',
+            'data': {'title': 'Who Let The Dogs Out?'}
+        },
+        {
+            'schemaName': 'single',
+            'schemaVersion': 2,
+            'data': {'title': 'D-O-G-G', 'label': 'Snoop'}
+        }
+    ]
+
+
+@pytest.fixture
+def upgraded_catalog():
+    return [
+        {
+            'schemaName': 'single',
+            'schemaVersion': 3,
+            'data': {'title': 'Scooby Snacks', 'label': 'Unknown'}
+        },
+        {
+            'schemaName': 'album',
+            'data': {'title': 'Who Let The Dogs Out?'}
+        },
+        {
+            'schemaName': 'single',
+            'schemaVersion': 3,
+            'data': {'title': 'D-O-G-G', 'label': 'Snoop'}
+        }
+    ]
+
+
+def test_typed_schema_version(versioned_single):
+    schema = schema_registry['single'].typed_schema
+    assert schema['properties']['schemaVersion']['default'] == 3
+    assert 'schemaVersion' not in schema['required']
+
+
+def test_upgrade_item(versioned_single, old_catalog, upgraded_catalog):
+    upgraded = [upgrade_item(item) for item in old_catalog]
+    assert upgraded == upgraded_catalog
+
+
+def test_upgrade_chain_is_cached(versioned_single):
+    chain = get_upgrade_chain('single', 1)
+    assert get_upgrade_chain('single', 1) is chain
+    assert chain({'name': 'Snacks', 'price': 2}) == {
+        'title': 'Snacks', 'label': 'Unknown'
+    }
+
+
+@pytest.mark.django_db
+def test_upgrade_on_read(versioned_single, old_catalog, upgraded_catalog):
+    RecordShop.objects.create(name='HMV', catalog=old_catalog)
+
+    record_shop = RecordShop.objects.get(name='HMV')
+    assert record_shop.catalog._data == upgraded_catalog
+    assert record_shop.catalog[0].title == 'Scooby Snacks'
+    assert get_upgrade_counts() == {('single', 1): 1, ('single', 2): 1}
+
+
+@pytest.mark.django_db
+class TestMigrateSchema:
+    def test_sql_migration(
+        self, versioned_single, old_catalog, upgraded_catalog
+    ):
+        for name in ['HMV', 'Virgin', 'Tower']:
+            RecordShop.objects.create(name=name, catalog=old_catalog)
+        RecordShop.objects.create(name='OurPrice', catalog=None)
+
+        migrate_schema(RecordShop, 'catalog', 'single', batch_size=2)
+
+        for record_shop in RecordShop.objects.exclude(catalog=None):
+            assert record_shop.catalog._data == upgraded_catalog
+
+    def test_python_migration(
+        self, monkeypatch, versioned_single, old_catalog, upgraded_catalog
+    ):
+        meta = schema_registry['single'].Meta
+        monkeypatch.setattr(meta, 'upgrades', {
+            1: [lambda data: {'title': data['name'], 'price': 3}],
+            2: [AddField('label', default='Unknown'), RemoveField('price')]
+        })
+        RecordShop.objects.create(name='HMV', catalog=old_catalog)
+
+        migrate_schema(RecordShop, 'catalog', 'single', batch_size=1)
+
+        record_shop = RecordShop.objects.get(name='HMV')
+        assert record_shop.catalog._data == upgraded_catalog
+
+    def test_migration_operation(
+        self, versioned_single, old_catalog, upgraded_catalog
+    ):
+        RecordShop.objects.create(name='HMV', catalog=old_catalog)
+
+        operation = UpgradeSchemaVersion('RecordShop', 'catalog', 'single')
+        state = ProjectState.from_apps(apps)
+        with connection.schema_editor() as schema_editor:
+            operation.database_forwards(
+                'mock_app', schema_editor, state, state
+            )
+
+        record_shop = RecordShop.objects.get(name='HMV')
+        assert record_shop.catalog._data == upgraded_catalog
@@ -0,0 +1,122 @@
+from django.apps import apps
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.migrations.state import ProjectState
+from django.db.models import F
+import pytest
+
+from ..operations import AddSearchVector
+from ..schema_fields import (
+    ArrayField,
+    CharField,
+    DynamicArrayField,
+    ObjectField,
+    TextField
+)
+from ..search import get_text_paths, search_vector_sql
+from .mock_app.models import RecordLabel
+from .mock_app.schema_fields import music_catalog_field
+
+
+class SearchArticleField(ObjectField):
+    headline = CharField(required=True)
+    body = TextField()
+    status = CharField(choices=[('draft', 'Draft'), ('live', 'Live')])
+    keywords = ArrayField(base_field=CharField(required=True))
+
+
+search_page_field = DynamicArrayField(
+    allowed_fields=[SearchArticleField()]
+)
+
+
+def test_text_paths():
+    assert get_text_paths(search_page_field) == [
+        (
+            'search_article.headline',
+            '$[*] ? (@.schemaName == "search_article").data."headline"',
+            'A'
+        ),
+        (
+            'search_article.body',
+            '$[*] ? (@.schemaName == "search_article").data."body"',
+            'B'
+        ),
+        (
+            'search_article.keywords',
+            '$[*] ? (@.schemaName == "search_article").data."keywords"[*]',
+            'A'
+        ),
+    ]
+    weighted = get_text_paths(search_page_field, weights={
+        'search_article.body': 'C', 'search_article.keywords': None
+    })
+    assert [(path, weight) for path, _, weight in weighted] == [
+        ('search_article.headline', 'A'), ('search_article.body', 'C')
+    ]
+
+
+@pytest.mark.django_db
+def test_search_vector_sql():
+    sql, params = search_vector_sql(search_page_field, 'document')
+    document = (
+        '[{"schemaName": "search_article", "data": {"headline": "Dogs", '
+        '"body": "Cats chasing mice", "status": "draft", '
+        '"keywords": ["pets"]}}]'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT ({})::text FROM (SELECT %s::jsonb) AS "
+            "documents(document)".format(sql),
+            params + [document]
+        )
+        vector = cursor.fetchone()[0]
+    assert vector == "'cat':3B 'chase':4B 'dog':1A 'mice':5B 'pet':2A"
+
+
+@pytest.mark.django_db
+def test_add_search_vector():
+    blur = RecordLabel.objects.create(name='Blur', catalog=[
+        {'schemaName': 'single', 'data': {'title': 'Parklife'}},
+    ])
+
+    operation = AddSearchVector(
+        'RecordLabel', 'catalog', 'search_vector',
+        weights={'single.artist': 'B'}
+    )
+    state = ProjectState.from_apps(apps)
+    with connection.schema_editor() as schema_editor:
+        operation.database_forwards('mock_app', schema_editor, state, state)
+
+    RecordLabel.objects.create(name='Oasis', catalog=[
+        {'schemaName': 'single', 'data': {'title': 'Wonderwall'}},
+        {'schemaName': 'album', 'data': {'title': 'Parklife Covers'}},
+    ])
+    RecordLabel.objects.create(name='Empty', catalog=None)
+
+    def search(terms):
+        query = SearchQuery(terms)
+        return list(
+            RecordLabel.objects.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', 'name').values_list('name', flat=True)
+        )
+
+    assert search('parklife') == ['Blur', 'Oasis']
+    assert search('wonderwall') == ['Oasis']
+
+    blur.catalog = [{'schemaName': 'album', 'data': {'title': 'Leisure'}}]
+    blur.save()
+    assert search('leisure') == ['Blur']
+    assert search('parklife') == ['Oasis']
+
+    with connection.schema_editor() as schema_editor:
+        operation.database_backwards('mock_app', schema_editor, state, state)
+    RecordLabel.objects.filter(name='Oasis').update(catalog=[])
+    assert search('wonderwall') == ['Oasis']
+
+
+def test_music_catalog_text_paths():
+    assert [path for path, _, _ in get_text_paths(music_catalog_field)] == [
+        'single.title', 'single.artist', 'album.title'
+    ]
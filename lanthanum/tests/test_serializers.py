@@ -0,0 +1,104 @@
+from django.core.exceptions import ValidationError
+import pytest
+
+from ..schema_fields import ArrayField, DynamicArrayField
+from ..serializers import get_deserializer, get_serializer, openapi_components
+from .mock_app.schema_fields import music_catalog_field
+
+
+@pytest.fixture
+def pet_field(dog_field, fish_field):
+    return DynamicArrayField(
+        schema_name="serialized_pets",
+        allowed_fields=[dog_field(), fish_field()],
+        max_items=3
+    )
+
+
+class TestSerializer:
+    def test_serialize_dynamic_array(self, pet_field, scooby_doo, nemo):
+        serialize = get_serializer(pet_field)
+        assert get_serializer(pet_field) is serialize
+
+        data = [
+            {'schemaName': 'dog', 'data': dict(scooby_doo, extra=True)},
+            {'schemaName': 'fish', 'data': nemo}
+        ]
+        assert serialize(data) == [
+            {'schemaName': 'dog', 'data': scooby_doo},
+            {'schemaName': 'fish', 'data': nemo}
+        ]
+
+    def test_serialize_nested(self, person_field, shaggy):
+        assert get_serializer(person_field())(shaggy) == shaggy
+
+
+class TestDeserializer:
+    def test_valid_data(self, pet_field, scooby_doo):
+        deserialize = get_deserializer(pet_field)
+        data = [
+            {'schemaName': 'dog', 'data': scooby_doo},
+            {'schemaName': 'fish', 'data': {'name': 'Dory'}}
+        ]
+        assert deserialize(data) == [
+            {'schemaName': 'dog', 'data': scooby_doo},
+            {
+                'schemaName': 'fish',
+                'data': {'name': 'Dory', 'salt_water': False}
+            }
+        ]
+
+    @pytest.mark.parametrize('data,pointer', [
+        ([{'schemaName': 'cat', 'data': {}}], '/0'),
+        ([{'schemaName': 'dog', 'data': {'breed': 'Pug'}}], '/0/data/name'),
+        ([{'schemaName': 'dog', 'data': {'name': 1}}], '/0/data/name'),
+        (
+            [{'schemaName': 'fish', 'data': {'name': 'A', 'ocean': 'x'}}],
+            '/0/data/ocean'
+        ),
+        (
+            [{'schemaName': 'dog', 'data': {'name': 'A', 'age': 1}}],
+            '/0/data/age'
+        ),
+        ([{'schemaName': 'dog', 'data': {'name': 'A'}}] * 4, ''),
+    ])
+    def test_invalid_data(self, pet_field, data, pointer):
+        with pytest.raises(ValidationError) as error:
+            get_deserializer(pet_field)(data)
+        assert error.value.messages[0].startswith(pointer + ":")
+
+    def test_array(self, dog_field, scooby_doo):
+        deserialize = get_deserializer(ArrayField(base_field=dog_field()))
+        assert deserialize([scooby_doo]) == [scooby_doo]
+        with pytest.raises(ValidationError):
+            deserialize(scooby_doo)
+
+
+def test_openapi_components():
+    schemas = openapi_components(music_catalog_field)['schemas']
+    catalog_name = music_catalog_field.Meta.schema_name
+
+    assert set(schemas) == {
+        catalog_name, 'single', 'album', 'single_item', 'album_item'
+    }
+    catalog = schemas[catalog_name]
+    assert catalog['type'] == 'array'
+    assert catalog['items']['discriminator'] == {
+        'propertyName': 'schemaName',
+        'mapping': {
+            'single': '#/components/schemas/single_item',
+            'album': '#/components/schemas/album_item'
+        }
+    }
+    assert schemas['single_item']['properties']['data'] == {
+        '$ref': '#/components/schemas/single'
+    }
+    assert schemas['single'] == {
+        'type': 'object',
+        'title': 'Single',
+        'properties': {
+            'title': {'type': 'string', 'title': 'Title', 'minLength': 1},
+            'artist': {'type': 'string', 'title': 'Artist'}
+        },
+        'required': ['title']
+    }
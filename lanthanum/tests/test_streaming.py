@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from ..streaming import iter_dynamic_array, iter_json_array
+
+
+class TestIterJsonArray:
+    @pytest.mark.parametrize('chunk_size', [1, 3, 1024])
+    def test_text_stream(self, chunk_size):
+        items = [12345, -1.5e3, "a, ]string", None, True, {'a': [1, 2]}, []]
+        stream = io.StringIO(json.dumps(items, indent=2))
+        assert list(iter_json_array(stream, chunk_size=chunk_size)) == items
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 1024])
+    def test_binary_stream(self, chunk_size):
+        items = [{'name': 'Ñandú'}, {'name': '犬'}]
+        stream = io.BytesIO(json.dumps(items, ensure_ascii=False).encode())
+        assert list(iter_json_array(stream, chunk_size=chunk_size)) == items
+
+    def test_empty_array(self):
+        assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+
+    def test_not_an_array(self):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO('{"a": 1}')))
+
+    def test_truncated_array(self):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO('[1, {"a": '), chunk_size=2))
+
+
+class TestIterDynamicArray:
+    @pytest.fixture(autouse=True)
+    def pet_fields(self, dog_field, fish_field):
+        dog_field()
+        fish_field()
+
+    def test_hydrate_items(self, scooby_doo, nemo):
+        stream = io.BytesIO(json.dumps([
+            {'schemaName': 'dog', 'data': scooby_doo},
+            {'schemaName': 'fish', 'data': nemo}
+        ]).encode())
+
+        dog, fish = iter_dynamic_array(stream, chunk_size=4)
+        assert dog.name == scooby_doo['name']
+        assert dog.breed == scooby_doo['breed']
+        assert fish.name == nemo['name']
+        assert fish.salt_water == nemo['salt_water']
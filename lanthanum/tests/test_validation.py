@@ -0,0 +1,263 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+import pytest
+
+from ..schema_fields import (
+    BooleanField,
+    CharField,
+    DecimalField,
+    DynamicArrayField,
+    IntegerField,
+    ObjectField
+)
+from ..validation import get_validator, validate_schema
+from .mock_app.models import RecordShop
+
+
+@pytest.fixture
+def pet_field(dog_field, fish_field):
+    return DynamicArrayField(
+        schema_name="validated_pets",
+        allowed_fields=[dog_field(), fish_field()],
+        max_items=3
+    )
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop.run_until_complete
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+class TestDocumentValidator:
+    def test_valid_data(self, pet_field, scooby_doo, nemo):
+        validator = get_validator(pet_field)
+        assert get_validator(pet_field) is validator
+        data = [
+            {'schemaName': 'dog', 'data': scooby_doo},
+            {'schemaName': 'fish', 'data': nemo}
+        ]
+        assert list(validator.iter_errors(data)) == []
+        validator.validate(data)
+
+    @pytest.mark.parametrize('data,pointers', [
+        ([{'schemaName': 'cat', 'data': {}}], ['/0']),
+        ([{'schemaName': 'dog', 'data': {'breed': 'Pug'}}], ['/0/data']),
+        (
+            [
+                {'schemaName': 'dog', 'data': {'name': 1}},
+                {'schemaName': 'fish', 'data': {'name': 'A', 'ocean': 'x'}}
+            ],
+            ['/0/data/name', '/1/data/ocean']
+        ),
+        ([{'schemaName': 'dog', 'data': {'name': 'A'}}] * 4, ['']),
+        ({'schemaName': 'dog'}, ['']),
+    ])
+    def test_invalid_data(self, pet_field, data, pointers):
+        errors = list(get_validator(pet_field).iter_errors(data))
+        assert [pointer for pointer, message in errors] == pointers
+
+        with pytest.raises(ValidationError) as error:
+            validate_schema('validated_pets', data)
+        assert len(error.value.messages) == len(pointers)
+
+    def test_get_errors(self, pet_field):
+        data = [
+            {'schemaName': 'dog', 'data': {'name': 1, 'breed': 2}},
+            {'schemaName': 'fish', 'data': {}}
+        ]
+        validator = get_validator(pet_field)
+        assert validator.get_errors(data) == {
+            '/0/data/name': ["1 is not of type 'string'"],
+            '/0/data/breed': ["2 is not of type 'string'"],
+            '/1/data': ["'name' is a required property"]
+        }
+        assert validator.get_errors(data, fail_fast=True) == {
+            '/0/data/name': ["1 is not of type 'string'"]
+        }
+        assert not validator.is_valid(data)
+        assert validator.is_valid(data[:0])
+
+        with pytest.raises(ValidationError) as error:
+            validator.validate(data, fail_fast=True)
+        assert error.value.messages == [
+            "/0/data/name: 1 is not of type 'string'"
+        ]
+        assert error.value.error_list[0].params['pointer'] == '/0/data/name'
+
+    def test_previous_data(self, pet_field, scooby_doo, nemo):
+        validator = get_validator(pet_field)
+        dog = {'schemaName': 'dog', 'data': scooby_doo}
+        fish = {'schemaName': 'fish', 'data': nemo}
+        bad_dog = {'schemaName': 'dog', 'data': {'name': 1}}
+        bad_dog_errors = {'/0/data/name': ["1 is not of type 'string'"]}
+
+        # Previous data isn't trusted until it has been found to be valid
+        previous = [dog, bad_dog]
+        assert validator.get_errors(
+            [bad_dog, dog], previous=previous
+        ) == bad_dog_errors
+        assert validator.get_errors(previous, previous=previous) == {
+            '/1/data/name': ["1 is not of type 'string'"]
+        }
+
+        previous = [dog, fish]
+        validator.validate(previous)
+        assert validator.get_errors([fish, dog], previous=previous) == {}
+        assert validator.get_errors(
+            [bad_dog, fish, {'schemaName': 'fish', 'data': {}}],
+            previous=previous
+        ) == dict(bad_dog_errors, **{
+            '/2/data': ["'name' is a required property"]
+        })
+        # The array itself is still checked
+        assert validator.get_errors([dog] * 4, previous=previous) == {
+            '': ['[{0}, {0}, {0}, {0}] is too long'.format(dog)]
+        }
+        assert list(validator.iter_changed_items(
+            [fish, dog, bad_dog, dog], [dog, fish]
+        )) == [(2, bad_dog, None)]
+
+    def test_previous_subtrees(self, person_field, shaggy, monkeypatch):
+        validator = get_validator(person_field())
+        validator.validate(shaggy)
+
+        # The unchanged dog isn't checked again
+        dog_node = validator.node.properties['favourite_dog']
+        monkeypatch.setattr(dog_node, 'validator', None)
+        monkeypatch.setattr(dog_node, 'shallow_validator', None)
+        edited = dict(shaggy, name=1, favourite_colour='pink')
+        assert validator.get_errors(edited, previous=shaggy) == {
+            '/name': ["1 is not of type 'string'"],
+            '/favourite_colour': [
+                "'pink' is not one of ['red', 'green', 'blue']"
+            ]
+        }
+        monkeypatch.undo()
+
+        edited = dict(shaggy, favourite_dog={'breed': 'Pug'})
+        assert validator.get_errors(edited, previous=shaggy) == {
+            '/favourite_dog': ["'name' is a required property"]
+        }
+
+    def test_previous_types(self, pet_field):
+        class StockField(ObjectField):
+            copies = IntegerField()
+            in_stock = BooleanField()
+
+        validator = get_validator(StockField())
+        previous = {'copies': 1, 'in_stock': True}
+        validator.validate(previous)
+        # Python finds these equal to the previous values, JSON Schema doesn't
+        assert validator.get_errors(
+            {'copies': True, 'in_stock': 1}, previous=previous
+        ) == {
+            '/copies': ["True is not of type 'integer'"],
+            '/in_stock': ["1 is not of type 'boolean'"]
+        }
+
+        item = {'schemaName': 'dog', 'data': {'name': True}}
+        assert list(get_validator(pet_field).iter_changed_items(
+            [item], [{'schemaName': 'dog', 'data': {'name': 1}}]
+        )) == [(0, item, {'schemaName': 'dog', 'data': {'name': 1}})]
+
+    def test_decimal(self):
+        class PriceField(ObjectField):
+            label = CharField()
+            price = DecimalField(required=True)
+
+        validator = get_validator(PriceField())
+        assert list(validator.iter_errors({'price': 9.99})) == []
+        assert list(validator.iter_errors({'price': 7})) == []
+        assert [
+            pointer
+            for pointer, message in validator.iter_errors({'price': '9.99'})
+        ] == ['/price']
+
+
+@pytest.mark.django_db
+class TestDynamicFieldValidation:
+    def test_full_clean(self):
+        record_shop = RecordShop(
+            name='HMV', catalog=[{'schemaName': 'single', 'data': {}}]
+        )
+        with pytest.raises(ValidationError) as error:
+            record_shop.full_clean()
+        assert error.value.message_dict['catalog'] == [
+            "/0/data: 'title' is a required property"
+        ]
+
+    def test_full_clean_unencodable_value(self):
+        field = RecordShop._meta.get_field('catalog')
+        catalog = field.output_type(
+            [{'schemaName': 'single', 'data': {'title': 'A', 'artist': 'B'}}]
+        )
+        catalog[0].artist = object()
+        record_shop = RecordShop(name='HMV', catalog=catalog)
+        with pytest.raises(ValidationError) as error:
+            record_shop.full_clean()
+        assert error.value.error_dict['catalog'][0].code == 'invalid'
+
+    def test_full_clean_loaded_value(self):
+        RecordShop.objects.create(
+            name='HMV',
+            catalog=[{'schemaName': 'album', 'data': {'title': 'Dogs'}}]
+        )
+        RecordShop.objects.get().full_clean()
+
+    def test_field_errors(self):
+        field = RecordShop._meta.get_field('catalog')
+        data = [{'schemaName': 'single', 'data': {'title': ''}}]
+        assert field.get_errors(data) == {
+            '/0/data/title': ["'' is too short"]
+        }
+        assert not field.is_valid(data)
+
+    def test_avalidate(self, run):
+        field = RecordShop._meta.get_field('catalog')
+        run(field.avalidate([{'schemaName': 'album', 'data': {'title': 'A'}}]))
+        with pytest.raises(ValidationError):
+            run(field.avalidate([{'schemaName': 'album', 'data': {}}]))
+
+    def test_ahydrate_many(self, run, monkeypatch):
+        field = RecordShop._meta.get_field('catalog')
+        executor = ThreadPoolExecutor(max_workers=2)
+        monkeypatch.setattr(field, 'executor', executor)
+
+        values = [
+            [{'schemaName': 'album', 'data': {'title': str(i)}}]
+            for i in range(5)
+        ]
+        documents = run(field.ahydrate_many(values))
+        assert [document[0].title for document in documents] == [
+            '0', '1', '2', '3', '4'
+        ]
+        executor.shutdown()
+
+
+@pytest.mark.parametrize('executor_class', [
+    ThreadPoolExecutor, ProcessPoolExecutor
+])
+def test_parallel_validation(dog_field, scooby_doo, executor_class):
+    pet_field = DynamicArrayField(
+        schema_name="parallel_pets", allowed_fields=[dog_field()]
+    )
+    data = [{'schemaName': 'dog', 'data': scooby_doo}] * 10
+    data[3] = {'schemaName': 'dog', 'data': {'name': 3}}
+    data[8] = {'schemaName': 'cat', 'data': {}}
+    validator = get_validator(pet_field)
+
+    with executor_class(max_workers=2) as executor:
+        errors = validator.parallel_errors(data, executor, chunk_size=3)
+        assert errors == list(validator.iter_errors(data))
+        assert [pointer for pointer, message in errors] == [
+            '/3/data/name', '/8'
+        ]
+        with pytest.raises(ValidationError) as error:
+            validator.validate(data, executor=executor, threshold=5)
+        assert len(error.value.messages) == 2
@@ -0,0 +1,229 @@
+from collections import Counter
+import json
+import threading
+
+from .schema_registry import get_schema_field
+
+
+INITIAL_VERSION = 1
+
+
+class Transform(object):
+    """
+    A declarative change to the data of a schema between two versions
+    """
+    def apply(self, data):
+        """
+        Apply the change to a python dict of schema data
+        """
+        raise NotImplementedError
+
+    def as_sql(self, expression, params):
+        """
+        Build a jsonb SQL expression applying the change to an expression
+
+        Returns a tuple of (sql, params), or None if the change can only be
+        applied in python.
+        """
+        return None
+
+
+class AddField(Transform):
+    """
+    Add a sub field to the data, keeping any existing value
+    """
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+
+    def apply(self, data):
+        if self.name not in data:
+            data = dict(data)
+            data[self.name] = self.default
+        return data
+
+    def as_sql(self, expression, params):
+        sql = "jsonb_build_object(%s, %s::jsonb) || ({})".format(expression)
+        return sql, [self.name, json.dumps(self.default)] + params
+
+
+class RemoveField(Transform):
+    """
+    Remove a sub field from the data
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def apply(self, data):
+        data = dict(data)
+        data.pop(self.name, None)
+        return data
+
+    def as_sql(self, expression, params):
+        return "({}) - %s".format(expression), params + [self.name]
+
+
+class RenameField(Transform):
+    """
+    Rename a sub field of the data
+    """
+    def __init__(self, old_name, new_name):
+        self.old_name = old_name
+        self.new_name = new_name
+
+    def apply(self, data):
+        if self.old_name not in data:
+            return data
+        data = dict(data)
+        data[self.new_name] = data.pop(self.old_name)
+        return data
+
+    def as_sql(self, expression, params):
+        sql = (
+            "CASE WHEN ({expression}) ? %s "
+            "THEN (({expression}) - %s) || "
+            "jsonb_build_object(%s, ({expression}) -> %s) "
+            "ELSE ({expression}) END"
+        ).format(expression=expression)
+        return sql, (
+            params + [self.old_name] +
+            params + [self.old_name, self.new_name] +
+            params + [self.old_name] +
+            params
+        )
+
+
+class RunPython(Transform):
+    """
+    Change the data with a python function
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def apply(self, data):
+        return self.function(data)
+
+
+def get_schema_version(schema_name):
+    """
+    Get the current version for a schema name
+    """
+    version = get_schema_field(schema_name).Meta.schema_version
+    return INITIAL_VERSION if version is None else version
+
+
+def get_item_version(item):
+    """
+    Get the version a typed item was saved with
+    """
+    return item.get('schemaVersion') or INITIAL_VERSION
+
+
+def get_transforms(schema_name, from_version):
+    """
+    Get the transforms to upgrade data from one version to the next
+    """
+    upgrades = get_schema_field(schema_name).Meta.upgrades
+    return [
+        transform if isinstance(transform, Transform) else RunPython(transform)
+        for transform in upgrades.get(from_version, [])
+    ]
+
+
+_upgrade_chains = {}
+_upgrade_counts = Counter()
+_upgrade_counts_lock = threading.Lock()
+
+
+def get_upgrade_chain(schema_name, from_version):
+    """
+    Get a function upgrading data from a version to the current version
+
+    The transforms for each step are composed once per schema name and
+    version, and reused for every later item.
+    """
+    key = (schema_name, from_version)
+    try:
+        return _upgrade_chains[key]
+    except KeyError:
+        pass
+
+    steps = []
+    for version in range(from_version, get_schema_version(schema_name)):
+        steps.extend(
+            transform.apply
+            for transform in get_transforms(schema_name, version)
+        )
+
+    def upgrade_chain(data):
+        for step in steps:
+            data = step(data)
+        return data
+
+    _upgrade_chains[key] = upgrade_chain
+    return upgrade_chain
+
+
+def clear_upgrade_chains():
+    """
+    Forget compiled upgrade chains, e.g. after changing a schema's upgrades
+    """
+    _upgrade_chains.clear()
+
+
+def get_upgrade_counts():
+    """
+    Count the items upgraded on read by schema name and original version
+
+    A schema that is still upgrading items regularly is worth migrating.
+    """
+    with _upgrade_counts_lock:
+        return dict(_upgrade_counts)
+
+
+def reset_upgrade_counts():
+    """
+    Start counting items upgraded on read from zero
+    """
+    with _upgrade_counts_lock:
+        _upgrade_counts.clear()
+
+
+def upgrade_item(item):
+    """
+    Upgrade a typed item to the current version of its schema
+    """
+    schema_name = item['schemaName']
+    current_version = getattr(
+        get_schema_field(schema_name).Meta, 'schema_version', None
+    )
+    if current_version is None:
+        return item
+
+    version = item.get('schemaVersion') or INITIAL_VERSION
+    if version >= current_version:
+        return item
+
+    with _upgrade_counts_lock:
+        _upgrade_counts[(schema_name, version)] += 1
+
+    upgraded_item = dict(item)
+    upgraded_item['data'] = get_upgrade_chain(schema_name, version)(
+        item['data']
+    )
+    upgraded_item['schemaVersion'] = current_version
+    return upgraded_item
+
+
+def upgrade_items(items):
+    """
+    Upgrade a list of typed items, returning the same list if none changed
+    """
+    upgraded_items = None
+    for i, item in enumerate(items):
+        upgraded_item = upgrade_item(item)
+        if upgraded_item is not item:
+            if upgraded_items is None:
+                upgraded_items = list(items)
+            upgraded_items[i] = upgraded_item
+    return items if upgraded_items is None else upgraded_items
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'lanthanum'
+
+urlpatterns = [
+    path(
+        'schemas/<str:schema_name>.js',
+        views.editor_schema,
+        name='editor_schema'
+    ),
+]
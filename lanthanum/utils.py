@@ -1,5 +1,9 @@
+import hashlib
+import json
 import re
 
+from django.core.serializers.json import DjangoJSONEncoder
+
 
 def camel_to_underscore(string_in):
     """
@@ -23,3 +27,37 @@ def field_to_schema_name(field_name):
     Convert a field class name to a schema name and remove the Field suffix
     """
     return camel_to_underscore(strip_suffix(field_name, "Field"))
+
+
+def canonical_json(data):
+    """
+    Dump data to compact JSON with sorted keys, so equal data dumps equally
+    """
+    return json.dumps(
+        data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder
+    )
+
+
+def same_data(a, b):
+    """
+    Check whether two JSON values are the same, telling apart values that
+    Python finds equal, such as true, 1 and 1.0
+    """
+    if a is b:
+        return True
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(
+            same_data(value, b[key]) for key, value in a.items()
+        )
+    if isinstance(a, (list, tuple)):
+        return isinstance(b, (list, tuple)) and len(a) == len(b) and all(
+            same_data(x, y) for x, y in zip(a, b)
+        )
+    return a.__class__ is b.__class__ and a == b
+
+
+def content_hash(data):
+    """
+    Hash the canonical JSON of some data
+    """
+    return hashlib.sha1(canonical_json(data).encode('utf-8')).hexdigest()
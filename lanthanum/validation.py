@@ -0,0 +1,380 @@
+from collections import OrderedDict
+from itertools import islice
+import threading
+
+from django.core.exceptions import ValidationError
+from jsonschema import Draft7Validator, validators
+
+from .schema_fields import DynamicArrayField
+from .schema_registry import get_schema_field
+from .utils import content_hash, same_data
+
+
+def _is_decimal(checker, instance):
+    return Draft7Validator.TYPE_CHECKER.is_type(instance, 'number')
+
+
+# Decimal fields use their own type name for json editor, but are stored as
+# JSON numbers
+SchemaValidator = validators.extend(
+    Draft7Validator,
+    type_checker=Draft7Validator.TYPE_CHECKER.redefine('decimal', _is_decimal)
+)
+
+# Dynamic arrays with fewer items than this are validated in process
+PARALLEL_THRESHOLD = 5000
+
+# The number of items sent to a worker at a time
+CHUNK_SIZE = 1000
+
+# The number of valid documents each validator remembers
+VALID_DOCUMENTS = 1000
+
+# Keywords checking a value against sub schemas as a whole, which can't be
+# checked one part at a time
+_COMBINING_KEYWORDS = {
+    '$ref', 'allOf', 'anyOf', 'oneOf', 'not', 'if', 'dependencies',
+    'patternProperties', 'additionalItems', 'contains'
+}
+
+_validators = {}
+
+
+def _pointer(path, parts):
+    """
+    Extend a JSON pointer with the parts of a path
+    """
+    for part in parts:
+        path = "{}/{}".format(
+            path, str(part).replace('~', '~0').replace('/', '~1')
+        )
+    return path
+
+
+class SchemaNode(object):
+    """
+    A JSON Schema split into a check of a value itself and a node for each
+    of its properties or items, so only the changed parts can be checked
+
+    Schemas combining sub schemas are checked as a whole.
+    """
+    def __init__(self, schema):
+        self.validator = SchemaValidator(schema)
+        self.shallow_validator = None
+        self.properties = None
+        self.items = None
+        if _COMBINING_KEYWORDS.intersection(schema):
+            return
+        if isinstance(schema.get('properties'), dict):
+            self.properties = {
+                name: SchemaNode(sub_schema)
+                for name, sub_schema in schema['properties'].items()
+            }
+            self.shallow_validator = SchemaValidator(dict(
+                schema, properties={name: {} for name in schema['properties']}
+            ))
+        elif isinstance(schema.get('items'), dict):
+            self.items = SchemaNode(schema['items'])
+            self.shallow_validator = SchemaValidator(dict(schema, items={}))
+
+    def iter_errors(self, data, path='', previous=None):
+        """
+        Yield a (pointer, message) pair for each error in some data
+
+        With previous valid data, parts the same as the previous parts are
+        skipped, so only the objects and arrays on the paths to changes are
+        checked.
+        """
+        if previous is not None and same_data(data, previous):
+            return
+        if previous is None or self.shallow_validator is None:
+            for error in self.validator.iter_errors(data):
+                yield _pointer(path, error.absolute_path), error.message
+            return
+        for error in self.shallow_validator.iter_errors(data):
+            yield _pointer(path, error.absolute_path), error.message
+        if self.properties is not None and isinstance(data, dict):
+            if not isinstance(previous, dict):
+                previous = {}
+            for name, node in self.properties.items():
+                if name in data:
+                    yield from node.iter_errors(
+                        data[name], _pointer(path, [name]), previous.get(name)
+                    )
+        elif self.items is not None and isinstance(data, list):
+            if not isinstance(previous, list):
+                previous = []
+            for i, item in enumerate(data):
+                yield from self.items.iter_errors(
+                    item,
+                    _pointer(path, [i]),
+                    previous[i] if i < len(previous) else None
+                )
+
+
+class DocumentValidator(object):
+    """
+    Validate the data of a schema field against its JSON Schema
+
+    Dynamic array items are validated by the schema for their schema name,
+    rather than trying every schema in the oneOf, so errors point at the
+    field that is wrong.
+
+    The content hashes of the last VALID_DOCUMENTS documents found to be
+    valid are remembered, so previous data is only trusted once it has
+    been checked.
+    """
+    def __init__(self, schema_field):
+        self.schema_field = schema_field
+        schema = schema_field.schema
+        self.item_nodes = None
+        if isinstance(schema_field, DynamicArrayField):
+            del schema['items']
+            self.item_nodes = {
+                allowed_field.Meta.schema_name: SchemaNode(
+                    allowed_field.get_typed_schema(
+                        item_id=schema_field._item_ids
+                    )
+                )
+                for allowed_field in schema_field._allowed_fields
+            }
+        self.node = SchemaNode(schema)
+        self.validator = self.node.validator
+        self._valid_hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_known_valid(self, data):
+        """
+        Check whether some data was found to be valid before
+        """
+        key = content_hash(data)
+        with self._lock:
+            if key not in self._valid_hashes:
+                return False
+            self._valid_hashes.move_to_end(key)
+            return True
+
+    def remember_valid(self, data):
+        """
+        Remember that some data is valid, so it can be trusted as previous
+        data
+        """
+        key = content_hash(data)
+        with self._lock:
+            self._valid_hashes[key] = True
+            self._valid_hashes.move_to_end(key)
+            while len(self._valid_hashes) > VALID_DOCUMENTS:
+                self._valid_hashes.popitem(last=False)
+
+    def iter_item_errors(self, item, path, previous=None):
+        """
+        Yield a (pointer, message) pair for each error in a typed item
+
+        A previous valid item of the same schema name limits the check to
+        the parts that changed.
+        """
+        node = None
+        if isinstance(item, dict):
+            node = self.item_nodes.get(item.get('schemaName'))
+        if node is None:
+            yield path, "unknown schema name"
+            return
+        if not isinstance(previous, dict) or (
+            previous.get('schemaName') != item['schemaName']
+        ):
+            previous = None
+        yield from node.iter_errors(item, path, previous)
+
+    def iter_chunk_errors(self, items, start):
+        """
+        Yield the errors of some items starting at an index of an array
+        """
+        for i, item in enumerate(items, start):
+            for error in self.iter_item_errors(item, _pointer('', [i])):
+                yield error
+
+    @staticmethod
+    def iter_changed_items(data, previous):
+        """
+        Yield the index and item of each item not found in a previous array,
+        with the previous item at the same index or None
+
+        Items are compared with the previous item at the same index first,
+        and then by content hash, so moved items are found as well.
+        """
+        previous_hashes = None
+        for i, item in enumerate(data):
+            previous_item = previous[i] if i < len(previous) else None
+            if same_data(item, previous_item):
+                continue
+            if previous_hashes is None:
+                previous_hashes = {
+                    content_hash(previous_item) for previous_item in previous
+                }
+            if content_hash(item) not in previous_hashes:
+                yield i, item, previous_item
+
+    def iter_errors(self, data, previous=None):
+        """
+        Yield a (pointer, message) pair for each error in some data
+
+        When previous data is given and known to be valid, only what
+        changed is checked: equal data is not checked at all, dynamic array
+        items already in the previous array are skipped, and only the parts
+        of objects and arrays that differ from the previous ones are checked.
+        """
+        if previous is not None and not self.is_known_valid(previous):
+            previous = None
+        if previous is not None and same_data(data, previous):
+            return
+        if self.item_nodes is None or not isinstance(data, list):
+            yield from self.node.iter_errors(data, '', previous)
+            return
+        for error in self.validator.iter_errors(data):
+            yield _pointer('', error.absolute_path), error.message
+        if not isinstance(previous, list):
+            for error in self.iter_chunk_errors(data, 0):
+                yield error
+            return
+        changed = self.iter_changed_items(data, previous)
+        for i, item, previous_item in changed:
+            yield from self.iter_item_errors(
+                item, _pointer('', [i]), previous_item
+            )
+
+    def parallel_errors(self, data, executor, chunk_size=CHUNK_SIZE):
+        """
+        List the errors in a dynamic array, checking chunks of items in an
+        executor
+
+        Workers are only sent the schema name and the items, and look up
+        their own validator, so a process pool can be used. Errors are
+        returned in the same order as iter_errors.
+        """
+        errors = [
+            (_pointer('', error.absolute_path), error.message)
+            for error in self.validator.iter_errors(data)
+        ]
+        if self.item_nodes is None or not isinstance(data, list):
+            return errors
+
+        schema_name = self.schema_field.Meta.schema_name
+        futures = [
+            executor.submit(
+                validate_items, schema_name, data[start:start + chunk_size],
+                start
+            )
+            for start in range(0, len(data), chunk_size)
+        ]
+        for future in futures:
+            errors.extend(future.result())
+        return errors
+
+    def get_errors(self, data, fail_fast=False, previous=None):
+        """
+        Get the error messages for some data keyed by JSON pointer
+
+        Pointers follow the sub field names of objects and the indexes of
+        arrays, such as "/3/data/title". With fail_fast validation stops at
+        the first error, which is all that is needed to know the data is
+        invalid.
+        """
+        errors = self.iter_errors(data, previous=previous)
+        if fail_fast:
+            errors = islice(errors, 1)
+        grouped = group_errors(errors)
+        if not grouped:
+            self.remember_valid(data)
+        return grouped
+
+    def is_valid(self, data, previous=None):
+        return not self.get_errors(data, fail_fast=True, previous=previous)
+
+    def validate(self, data, executor=None, threshold=PARALLEL_THRESHOLD,
+                 fail_fast=False, previous=None):
+        """
+        Raise a ValidationError listing every error as "pointer: message"
+
+        Dynamic arrays of at least threshold items are checked in chunks in
+        the executor when one is given, unless only the changes from
+        previous valid data are checked. With fail_fast only the first
+        error is found and raised.
+        """
+        if previous is not None and not self.is_known_valid(previous):
+            previous = None
+        if fail_fast:
+            errors = islice(self.iter_errors(data, previous=previous), 1)
+        elif executor is not None and previous is None and (
+            self.item_nodes is not None and
+            isinstance(data, list) and len(data) >= threshold
+        ):
+            errors = self.parallel_errors(data, executor)
+        else:
+            errors = self.iter_errors(data, previous=previous)
+        error = schema_error(errors)
+        if error is not None:
+            raise error
+        self.remember_valid(data)
+
+
+def group_errors(errors):
+    """
+    Group (pointer, message) pairs into lists of messages keyed by pointer
+    """
+    grouped = {}
+    for pointer, message in errors:
+        grouped.setdefault(pointer, []).append(message)
+    return grouped
+
+
+def schema_error(errors):
+    """
+    Build a ValidationError from (pointer, message) pairs, or None if empty
+
+    Each message is a separate error with the pointer in its params, so
+    forms can show the messages and widgets can find where they belong.
+    """
+    error_list = [
+        ValidationError(
+            "%(pointer)s: %(message)s",
+            code='schema',
+            params={'pointer': pointer, 'message': message}
+        )
+        for pointer, message in errors
+    ]
+    if error_list:
+        return ValidationError(error_list)
+    return None
+
+
+def get_validator(schema_field):
+    """
+    Get the validator for a schema field, built once for each field
+    """
+    try:
+        return _validators[schema_field]
+    except KeyError:
+        validator = _validators[schema_field] = DocumentValidator(schema_field)
+        return validator
+
+
+def validate_schema(schema_name, data, fail_fast=False):
+    """
+    Validate data for a registered schema name, raising a ValidationError
+
+    Only the schema name and data are passed, so this can be run in an
+    executor of worker processes as well as threads.
+    """
+    get_validator(get_schema_field(schema_name)).validate(
+        data, fail_fast=fail_fast
+    )
+
+
+def validate_items(schema_name, items, start):
+    """
+    List the errors in a chunk of the items of a dynamic array
+
+    The pointers of the errors count from the start of the whole array.
+    """
+    validator = get_validator(get_schema_field(schema_name))
+    return list(validator.iter_chunk_errors(items, start))
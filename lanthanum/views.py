@@ -0,0 +1,49 @@
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from .widgets import (
+    get_editor_schema_json,
+    get_schema_key,
+    get_schema_payload_hash
+)
+
+
+@staff_member_required
+@require_GET
+def editor_schema(request, schema_name):
+    """
+    Serve a script adding an editor schema to the page's shared schemas
+
+    Editor widgets include the script in their media with a hash of the
+    schema as its version, so every editor for a schema on a page shares
+    one copy, which browsers can cache until the schema changes. Requests
+    for any other version get the current schema, but not for caching.
+    Schemas are only served to staff users, so they are never cached by
+    shared caches.
+    """
+    collapsed = request.GET.get('collapsed') == '1'
+    paged = request.GET.get('paged') == '1'
+    try:
+        schema_json = get_editor_schema_json(schema_name, collapsed, paged)
+        version = get_schema_payload_hash(schema_name, collapsed, paged)
+    except KeyError:
+        raise Http404("There is no {} schema".format(schema_name))
+    script = (
+        "var lanthanumSchemas = window.lanthanumSchemas || {{}};\n"
+        "lanthanumSchemas[{}] = {};\n"
+    ).format(
+        json.dumps(get_schema_key(schema_name, collapsed, paged)),
+        json.dumps(schema_json)
+    )
+    response = HttpResponse(script, content_type='application/javascript')
+    if request.GET.get('v') == version:
+        patch_cache_control(
+            response, private=True, max_age=60 * 60 * 24 * 365
+        )
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
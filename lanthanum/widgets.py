@@ -1,32 +1,248 @@
 import copy
+from functools import lru_cache
 import json
+import re
+from urllib.parse import urlencode
 
 from django_admin_json_editor import JSONEditorWidget
+from django import forms
+from django.urls import NoReverseMatch, reverse
 from django.utils.safestring import mark_safe
 from django.template.loader import render_to_string
 
+from .field_types import get_data
+from .form_fields import PatchString
+from .instrumentation import timed_call
+from .schema_registry import get_schema_field
+from .utils import content_hash
+
+
+# Characters that could end a script element early, escaped as JSON allows
+_SCRIPT_ESCAPES = {
+    ord('<'): '\\u003C',
+    ord('>'): '\\u003E',
+    ord('&'): '\\u0026'
+}
+
+
+def script_json(data):
+    """
+    Dump data to JSON that can be written inside a script element
+    """
+    return json.dumps(data).translate(_SCRIPT_ESCAPES)
+
+
+def script_name(name):
+    """
+    Make a field name into a JavaScript identifier, as the names of formset
+    fields such as "form-0-catalog" aren't
+    """
+    identifier = re.sub(r'\W', '_', name)
+    if identifier[:1].isdigit():
+        identifier = '_' + identifier
+    return identifier
+
+
+def build_editor_schema(schema, collapsed, paged):
+    """
+    Prepare a schema for an editor with some display options
+    """
+    schema = copy.copy(schema)
+    schema['title'] = ' '
+    schema['options'] = {'collapsed': int(collapsed)}
+    if paged and 'items' in schema:
+        # Items are still built when collapsed, but take less room
+        items = dict(schema['items'])
+        items['options'] = dict(items.get('options', {}), collapsed=1)
+        schema['items'] = items
+    return schema
+
+
+def get_schema_key(schema_name, collapsed, paged):
+    """
+    The key of a shared schema in the page's registry of schemas
+    """
+    return '{}:{}:{}'.format(schema_name, int(collapsed), int(bool(paged)))
+
+
+@lru_cache(maxsize=256)
+def _get_editor_schema_json(schema_field, collapsed, paged):
+    return json.dumps(build_editor_schema(
+        schema_field.editor_schema, collapsed, paged
+    ))
+
+
+def get_editor_schema_json(schema_name, collapsed, paged):
+    """
+    Serialize the editor schema of a registered field, once per options
+
+    Schemas are cached by the registered field rather than its name, so a
+    field registered again under the same name is serialized again.
+    """
+    return _get_editor_schema_json(
+        get_schema_field(schema_name), collapsed, paged
+    )
+
+
+@lru_cache(maxsize=256)
+def _get_schema_payload_hash(schema_field, collapsed, paged):
+    return content_hash(
+        _get_editor_schema_json(schema_field, collapsed, paged)
+    )[:12]
+
+
+def get_schema_payload_hash(schema_name, collapsed, paged):
+    """
+    A short hash of a shared schema, so browsers can cache its script
+    """
+    return _get_schema_payload_hash(
+        get_schema_field(schema_name), collapsed, paged
+    )
+
 
 class JSONEditorWidget(JSONEditorWidget):
     template_name = 'lanthanum/_json_editor_widget.html'
 
+    def __init__(self, *args, **kwargs):
+        """
+        Optionally name the schema being edited for instrumentation, set
+        a page size to load the items of long arrays a page at a time, and
+        post a JSON Patch of the changes instead of the whole document
+        """
+        self._schema_name = kwargs.pop('schema_name', None)
+        self._page_size = kwargs.pop('page_size', None)
+        self._patch = kwargs.pop('patch', False)
+        self.errors = {}
+        self.base = None
+        super().__init__(*args, **kwargs)
+
+    def get_editor_errors(self):
+        """
+        Convert the schema errors by JSON pointer into json editor errors
+        """
+        editor_errors = []
+        for pointer, messages in self.errors.items():
+            path = '.'.join(['root'] + [
+                token.replace('~1', '/').replace('~0', '~')
+                for token in pointer.split('/')[1:]
+            ])
+            for message in messages:
+                editor_errors.append({
+                    'path': path,
+                    'property': 'server',
+                    'message': message
+                })
+        return editor_errors
+
+    def value_from_datadict(self, data, files, name):
+        """
+        Read the JSON Patch of the changes if one was posted
+        """
+        patch = data.get('{}_patch'.format(name))
+        if patch:
+            patch = PatchString(patch)
+            patch.base = data.get('{}_base'.format(name))
+            return patch
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return '{}_patch'.format(name) not in data and (
+            super().value_omitted_from_data(data, files, name)
+        )
+
+    def get_schema_url(self):
+        """
+        Get the URL of the script sharing the schema between editors
+
+        Returns None when the schema is embedded in each editor instead,
+        because it isn't a registered schema or lanthanum's URLs aren't
+        included in the project.
+        """
+        if self._schema_name is None or callable(self._schema):
+            return None
+        try:
+            url = reverse('lanthanum:editor_schema', args=[self._schema_name])
+        except NoReverseMatch:
+            return None
+        collapsed = int(self._collapsed)
+        paged = int(bool(self._page_size))
+        return '{}?{}'.format(url, urlencode([
+            ('collapsed', collapsed),
+            ('paged', paged),
+            ('v', get_schema_payload_hash(
+                self._schema_name, collapsed, paged
+            ))
+        ]))
+
+    @property
+    def media(self):
+        """
+        Include the shared schema, which forms include once per page
+        """
+        media = super().media
+        schema_url = self.get_schema_url()
+        if schema_url is not None:
+            media += forms.Media(js=[schema_url])
+        return media
+
     def render(self, name, value, attrs=None, renderer=None):
+        """
+        Render the editor, timing it when instrumentation is on
+        """
+        return timed_call(
+            self.__class__,
+            'render',
+            self._schema_name,
+            self._render,
+            name,
+            value,
+            measure=len
+        )
+
+    def _render(self, name, value):
         """
         Fix the JSON Editor widget by doing a standard json dump for dict data
 
         This will not convert booleans to ints like the standard JSON Editor.
         """
-        if callable(self._schema):
-            schema = self._schema(self)
+        if self.get_schema_url() is not None:
+            # Parse the schema shared by the page's media for each editor
+            schema = 'JSON.parse(lanthanumSchemas[{}])'.format(
+                json.dumps(get_schema_key(
+                    self._schema_name, self._collapsed, self._page_size
+                ))
+            )
         else:
-            schema = copy.copy(self._schema)
+            if callable(self._schema):
+                schema = self._schema(self)
+            else:
+                schema = self._schema
+            schema = script_json(build_editor_schema(
+                schema, self._collapsed, self._page_size
+            ))
+        if isinstance(value, str):
+            # The JSON is written into the page as it is
+            value = value.translate(_SCRIPT_ESCAPES)
 
-        schema['title'] = ' '
-        schema['options'] = {'collapsed': int(self._collapsed)}
+        original = None
+        if self._patch:
+            # Patches are made from the stored value, even when the editor
+            # shows a patched value again
+            if self.base is not None:
+                original = get_data(self.base)
+            elif isinstance(value, str) and value:
+                original = json.loads(value)
 
         context = {
             'name': name,
-            'schema': json.dumps(schema),
+            'js_name': script_name(name),
+            'schema': schema,
             'data': value,
             'sceditor': int(self._sceditor),
+            'errors': script_json(self.get_editor_errors()),
+            'page_size': int(self._page_size or 0),
+            'patch': int(self._patch),
+            'original': script_json(original),
+            'base': content_hash(original) if self._patch else '',
         }
         return mark_safe(render_to_string(self.template_name, context))
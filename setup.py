@@ -17,7 +17,7 @@ tests_require = [
 install_requires = [
     'django>=2.0',
     'django-admin-json-editor>=0.1.5',
-    'jsonschema>=2.6.0',
+    'jsonschema>=3.0.0',
     'psycopg2==2.7.5'
 ]
 